@@ -39,9 +39,10 @@ def main():
         
         # Aplicar carreteras bloqueadas desde la configuración
         blocked_roads = config.get_blocked_roads()
-        for blocked_road in blocked_roads:
-            if isinstance(blocked_road, list) and len(blocked_road) == 2:
-                road_grid.block_road(blocked_road[0], blocked_road[1])
+        road_grid.block_roads([
+            (blocked_road[0], blocked_road[1]) for blocked_road in blocked_roads
+            if isinstance(blocked_road, list) and len(blocked_road) == 2
+        ])
         
         # Obtener lista de domicilios a entregar
         delivery_addresses = config.get_delivery_addresses()
@@ -59,11 +60,15 @@ def main():
             strategy="nearest_neighbor"
         )
         
-        # Generar ruta optimizada con 2-opt
+        # Generar ruta optimizada con 2-opt. Se ejecuta después de la anterior
+        # a propósito: reutiliza los caminos mínimos que el optimizador dejó en
+        # caché, y el paralelismo ya está dentro de la estrategia (n_restarts)
         route_optimized = optimizer.optimize_route(
             start_poi="distribution_center",
             destination_pois=delivery_addresses,
-            strategy="2opt"
+            strategy="2opt",
+            n_restarts=grid_config.get("n_restarts", 1),
+            neighbor_k=grid_config.get("neighbor_k", 0)
         )
         
         # Generar visualización HTML con comparación
@@ -8,6 +8,13 @@ incluyendo parámetros del grid y definición de puntos de interés.
 import json
 from typing import List, Dict, Optional
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson es opcional; se usa el parser estándar
+    def _loads(raw: bytes):
+        return json.loads(raw.decode('utf-8'))
+
 
 class Config:
     """Gestor centralizado de configuración de la aplicación"""
@@ -16,6 +23,11 @@ class Config:
     DEFAULT_GRID_WIDTH = 15
     DEFAULT_GRID_HEIGHT = 12
     DEFAULT_CELL_SIZE = 50
+    # Una sola búsqueda 2-opt por defecto: la ruta no depende de la máquina
+    DEFAULT_N_RESTARTS = 1
+    # Sin listas de candidatos en 2-opt por defecto (búsqueda completa); con
+    # muchos destinos, 8-10 vecinos por POI podan la búsqueda casi sin perder calidad
+    DEFAULT_NEIGHBOR_K = 0
     
     def __init__(self, config_file: str):
         """
@@ -28,10 +40,25 @@ class Config:
             FileNotFoundError: Si el archivo no existe
             json.JSONDecodeError: Si el JSON es inválido
         """
-        with open(config_file, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+        with open(config_file, 'rb') as f:
+            self.data = _loads(f.read())
         
         self._validate()
+        
+        grid = self.data.get("grid", {})
+        self._grid_config = {
+            "width": grid.get("width", self.DEFAULT_GRID_WIDTH),
+            "height": grid.get("height", self.DEFAULT_GRID_HEIGHT),
+            "cell_size": grid.get("cell_size", self.DEFAULT_CELL_SIZE),
+            "blocked_roads": grid.get("blocked_roads", []),
+            "n_restarts": grid.get("n_restarts", self.DEFAULT_N_RESTARTS),
+            "neighbor_k": grid.get("neighbor_k", self.DEFAULT_NEIGHBOR_K),
+        }
+        self._nodes: List[Dict] = self.data.get("nodes", [])
+        self._delivery_addresses: List[str] = self.data.get("delivery_addresses", [])
+        
+        # Índice id -> nodo para búsquedas O(1)
+        self._nodes_by_id: Dict[str, Dict] = {node["id"]: node for node in self._nodes}
     
     def _validate(self) -> None:
         """Valida que la configuración tenga los campos requeridos"""
@@ -45,15 +72,11 @@ class Config:
         Obtiene configuración del grid con valores por defecto
         
         Returns:
-            Diccionario con parámetros: width, height, cell_size, blocked_roads
+            Diccionario con parámetros: width, height, cell_size, blocked_roads,
+            n_restarts (búsquedas 2-opt en paralelo), neighbor_k (candidatos
+            por POI en 2-opt, 0 = búsqueda completa)
         """
-        grid = self.data.get("grid", {})
-        return {
-            "width": grid.get("width", self.DEFAULT_GRID_WIDTH),
-            "height": grid.get("height", self.DEFAULT_GRID_HEIGHT),
-            "cell_size": grid.get("cell_size", self.DEFAULT_CELL_SIZE),
-            "blocked_roads": grid.get("blocked_roads", []),
-        }
+        return self._grid_config
     
     def get_nodes(self) -> List[Dict]:
         """
@@ -62,7 +85,7 @@ class Config:
         Returns:
             Lista de diccionarios con definición de nodos
         """
-        return self.data.get("nodes", [])
+        return self._nodes
     
     def get_delivery_addresses(self) -> List[str]:
         """
@@ -71,7 +94,7 @@ class Config:
         Returns:
             Lista de identificadores de domicilios
         """
-        return self.data.get("delivery_addresses", [])
+        return self._delivery_addresses
     
     def get_blocked_roads(self) -> List[str]:
         """
@@ -80,8 +103,7 @@ class Config:
         Returns:
             Lista de carreteras bloqueadas en formato [from_id, to_id]
         """
-        grid_config = self.get_grid_config()
-        return grid_config.get("blocked_roads", [])
+        return self._grid_config["blocked_roads"]
     
     def get_node_by_id(self, node_id: str) -> Optional[Dict]:
         """
@@ -93,7 +115,4 @@ class Config:
         Returns:
             Diccionario del nodo o None si no existe
         """
-        for node in self.get_nodes():
-            if node.get("id") == node_id:
-                return node
-        return None
+        return self._nodes_by_id.get(node_id)
@@ -1,158 +1,31 @@
-from typing import List, Tuple, Optional
+import io
+import json
+import os
+from functools import cached_property
+from typing import Iterator, List, Tuple, Optional, TextIO
 from src.optimization_strategies import OptimizedRoute
 
-class GridHTMLRenderer:
-    """Renderizador HTML mejorado para grid de carreteras"""
-    
-    def __init__(self, road_grid, config):
-        self.road_grid = road_grid
-        self.config = config
-    
-    def render_route(self, grid_route: OptimizedRoute, output_file: str = "output.html") -> None:
-        """Renderiza la ruta en un archivo HTML"""
-        html_content = self._generate_html(grid_route, None)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-    
-    def render_comparison(self, primary_route: OptimizedRoute, secondary_route: OptimizedRoute, 
-                         output_file: str = "output.html") -> None:
-        """Renderiza dos rutas para comparación"""
-        html_content = self._generate_html(primary_route, secondary_route)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-    
-    def _generate_html(self, primary_route: OptimizedRoute, secondary_route: Optional[OptimizedRoute] = None) -> str:
-        """Genera contenido HTML con una o dos rutas"""
-        css = self._generate_css()
-        
-        min_x, min_y, max_x, max_y = self.road_grid.get_grid_bounds()
-        viewbox = f"{min_x} {min_y} {max_x} {max_y}"
-        
-        # Canvas primario
-        canvas_primary = self._generate_canvas(primary_route, is_secondary=False)
-        
-        # Canvas secundario (si existe)
-        canvas_secondary = ""
-        secondary_section = ""
-        if secondary_route:
-            canvas_secondary = self._generate_canvas(secondary_route, is_secondary=True)
-            secondary_section = self._generate_secondary_section(secondary_route, viewbox, canvas_secondary)
-        
-        html = f"""<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Ruta de Entrega Optimizada - Grid Avanzado</title>
-    <style>
-{css}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🚚 Ruta de Entrega Optimizada</h1>
-        
-        {self._generate_primary_section(primary_route, viewbox, canvas_primary)}
-        
-        {secondary_section}
-        
-        <div class="legend">
-            <div class="legend-item">
-                <div class="legend-color" style="background: #ddd;"></div>
-                <span>Carreteras disponibles</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background: #3498db;"></div>
-                <span>Ruta óptima</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background: #e74c3c;"></div>
-                <span>Centro de distribución</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background: #27ae60;"></div>
-                <span>Domicilios</span>
-            </div>
-        </div>
-    </div>
-</body>
-</html>"""
-        return html
-    
-    def _generate_primary_section(self, grid_route, viewbox: str, canvas: str) -> str:
-        """Genera la sección primaria con la primera ruta"""
-        poi_sequence = " → ".join(grid_route.path)
-        intersection_count = len(grid_route.full_path)
-        
-        return f"""        <div class="route-section primary-section">
-            <h2>📍 Ruta Inicial</h2>
-            <div class="info-grid">
-                <div class="info-card">
-                    <h3>📊 Estadísticas</h3>
-                    <p><strong>Algoritmo:</strong> {grid_route.algorithm_name}</p>
-                    <p><strong>Distancia Total:</strong> {grid_route.total_distance:.2f} px</p>
-                    <p><strong>Intersecciones:</strong> {intersection_count}</p>
-                    <p><strong>Domicilios:</strong> {len(grid_route.path) - 1}</p>
-                </div>
-                <div class="info-card">
-                    <h3>🗺️ Ruta</h3>
-                    <p><strong>Secuencia:</strong></p>
-                    <p class="route-sequence">{poi_sequence}</p>
-                </div>
-                <div class="info-card">
-                    <h3>✅ Algoritmos Utilizados</h3>
-                    <p><strong>Dijkstra:</strong> Camino más corto</p>
-                    <p><strong>TSP:</strong> Vecino más cercano</p>
-                </div>
-            </div>
-            <div class="map-container">
-                <svg class="map" viewBox="{viewbox}">
-                    {canvas}
-                </svg>
-            </div>
-        </div>"""
-    
-    def _generate_secondary_section(self, grid_route, viewbox: str, canvas: str) -> str:
-        """Genera la sección secundaria con la ruta optimizada"""
-        poi_sequence = " → ".join(grid_route.path)
-        intersection_count = len(grid_route.full_path)
-        
-        return f"""        <div class="comparison-divider"></div>
-        
-        <div class="route-section secondary-section">
-            <h2>🚀 Ruta Optimizada</h2>
-            <div class="info-grid">
-                <div class="info-card highlight">
-                    <h3>📊 Estadísticas</h3>
-                    <p><strong>Algoritmo:</strong> {grid_route.algorithm_name}</p>
-                    <p><strong>Distancia Total:</strong> {grid_route.total_distance:.2f} px</p>
-                    <p><strong>Intersecciones:</strong> {intersection_count}</p>
-                    <p><strong>Domicilios:</strong> {len(grid_route.path) - 1}</p>
-                    {f'<p><strong>Iteraciones 2-Opt:</strong> {grid_route.iterations}</p>' if grid_route.iterations > 0 else ''}
-                </div>
-                <div class="info-card">
-                    <h3>🗺️ Ruta</h3>
-                    <p><strong>Secuencia:</strong></p>
-                    <p class="route-sequence">{poi_sequence}</p>
-                </div>
-                <div class="info-card">
-                    <h3>✅ Algoritmos Utilizados</h3>
-                    <p><strong>Dijkstra:</strong> Camino más corto</p>
-                    <p><strong>TSP + 2-Opt:</strong> Optimización local</p>
-                </div>
-            </div>
-            <div class="map-container">
-                <svg class="map" viewBox="{viewbox}">
-                    {canvas}
-                </svg>
-            </div>
-        </div>"""
-    
-    def _generate_css(self) -> str:
-        """Genera CSS para estilos"""
-        return """        * {
+# Plantillas de elementos SVG (formato % reutilizado en cada elemento);
+# las coordenadas llegan ya formateadas por _format_coord
+_ROAD_PATH_TMPL = '<path d="%s" class="%s"/>'
+_SEGMENT_TMPL = 'M%s %sL%s %s'
+_INTERSECTION_TMPL = '<circle cx="%s" cy="%s" r="3" class="%s"/>'
+# Intersecciones fuera de la ruta: un único punto repetido en mosaico (una celda por tile)
+_GRID_DOTS_TMPL = (
+    '<defs><pattern id="%(id)s" width="%(cell)s" height="%(cell)s" patternUnits="userSpaceOnUse">'
+    '<circle cx="%(center)s" cy="%(center)s" r="3" class="intersection"/></pattern>%(mask)s</defs>\n'
+    '<rect width="%(width)s" height="%(height)s" fill="url(#%(id)s)"%(mask_ref)s/>'
+)
+# Máscara del mosaico: quita el punto de cada intersección cerrada (r=4 cubre
+# el círculo y su borde) sin tapar las carreteras que pasan por debajo
+_GRID_DOTS_MASK_TMPL = (
+    '<mask id="%(id)s"><rect width="%(width)s" height="%(height)s" fill="white"/>%(holes)s</mask>'
+)
+_GRID_DOTS_HOLE_TMPL = '<circle cx="%s" cy="%s" r="4"/>'
+_POI_TMPL = '<circle cx="%s" cy="%s" r="8" class="%s"/>\n<text x="%s" y="%s" class="poi-label">%s</text>'
+
+# Hoja de estilos estática del reporte
+_CSS = """        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
@@ -271,6 +144,12 @@ class GridHTMLRenderer:
             width: 100%;
             height: 600px;
             display: block;
+            shape-rendering: optimizeSpeed;
+            text-rendering: optimizeSpeed;
+        }
+        
+        canvas.map {
+            object-fit: contain;
         }
         
         .grid-line {
@@ -378,67 +257,385 @@ class GridHTMLRenderer:
             border-radius: 2px;
             border: 1px solid #999;
         }"""
+
+# Cabecera HTML del reporte: es estática, así que la hoja de estilos se
+# incrusta una sola vez al importar el módulo
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Ruta de Entrega Optimizada - Grid Avanzado</title>
+    <style>
+""" + _CSS + """
+    </style>
+</head>
+"""
+
+# Cuerpo HTML del reporte
+_HTML_BODY_TEMPLATE = """<body>
+    <div class="container">
+        <h1>🚚 Ruta de Entrega Optimizada</h1>
+        
+        {primary_section}
+        
+        {secondary_section}
+        
+        <div class="legend">
+            <div class="legend-item">
+                <div class="legend-color" style="background: #ddd;"></div>
+                <span>Carreteras disponibles</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background: #3498db;"></div>
+                <span>Ruta óptima</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background: #e74c3c;"></div>
+                <span>Centro de distribución</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background: #27ae60;"></div>
+                <span>Domicilios</span>
+            </div>
+        </div>
+    </div>
+</body>
+</html>"""
+
+# Secciones de cada ruta (primaria y comparación)
+_PRIMARY_SECTION_TEMPLATE = """        <div class="route-section primary-section">
+            <h2>📍 Ruta Inicial</h2>
+            <div class="info-grid">
+                <div class="info-card">
+                    <h3>📊 Estadísticas</h3>
+                    <p><strong>Algoritmo:</strong> {algorithm}</p>
+                    <p><strong>Distancia Total:</strong> {distance:.2f} px</p>
+                    <p><strong>Intersecciones:</strong> {intersection_count}</p>
+                    <p><strong>Domicilios:</strong> {deliveries}</p>
+                </div>
+                <div class="info-card">
+                    <h3>🗺️ Ruta</h3>
+                    <p><strong>Secuencia:</strong></p>
+                    <p class="route-sequence">{poi_sequence}</p>
+                </div>
+                <div class="info-card">
+                    <h3>✅ Algoritmos Utilizados</h3>
+                    <p><strong>Dijkstra:</strong> Camino más corto</p>
+                    <p><strong>TSP:</strong> Vecino más cercano</p>
+                </div>
+            </div>
+            <div class="map-container">
+                {map}
+            </div>
+        </div>"""
+
+_SECONDARY_SECTION_TEMPLATE = """        <div class="comparison-divider"></div>
+        
+        <div class="route-section secondary-section">
+            <h2>🚀 Ruta Optimizada</h2>
+            <div class="info-grid">
+                <div class="info-card highlight">
+                    <h3>📊 Estadísticas</h3>
+                    <p><strong>Algoritmo:</strong> {algorithm}</p>
+                    <p><strong>Distancia Total:</strong> {distance:.2f} px</p>
+                    <p><strong>Intersecciones:</strong> {intersection_count}</p>
+                    <p><strong>Domicilios:</strong> {deliveries}</p>
+                    {iterations}
+                </div>
+                <div class="info-card">
+                    <h3>🗺️ Ruta</h3>
+                    <p><strong>Secuencia:</strong></p>
+                    <p class="route-sequence">{poi_sequence}</p>
+                </div>
+                <div class="info-card">
+                    <h3>✅ Algoritmos Utilizados</h3>
+                    <p><strong>Dijkstra:</strong> Camino más corto</p>
+                    <p><strong>TSP + 2-Opt:</strong> Optimización local</p>
+                </div>
+            </div>
+            <div class="map-container">
+                {map}
+            </div>
+        </div>"""
+
+_ITERATIONS_TEMPLATE = '<p><strong>Iteraciones 2-Opt:</strong> {iterations}</p>'
+
+# Plantillas partidas en sus huecos para escribir el reporte en streaming:
+# el cuerpo alrededor de cada sección y cada sección alrededor de su mapa
+_BODY_OPEN, _body_rest = _HTML_BODY_TEMPLATE.split("{primary_section}")
+_BODY_BETWEEN, _BODY_CLOSE = _body_rest.split("{secondary_section}")
+_PRIMARY_SECTION_OPEN, _PRIMARY_SECTION_CLOSE = _PRIMARY_SECTION_TEMPLATE.split("{map}")
+_SECONDARY_SECTION_OPEN, _SECONDARY_SECTION_CLOSE = _SECONDARY_SECTION_TEMPLATE.split("{map}")
+
+# Mapa SVG: envoltorio de los elementos generados por _iter_canvas_elements
+_SVG_MAP_OPEN = '<svg class="map" viewBox="%s">\n                    '
+_SVG_MAP_CLOSE = '\n                </svg>'
+
+# Mapa en <canvas>: un elemento y una llamada a drawGridMap con los datos del
+# grid en JSON. Sin un nodo DOM por primitiva, para grids muy grandes.
+_CANVAS_MAP_TMPL = (
+    '<canvas class="map" id="%(id)s" width="%(width)s" height="%(height)s"></canvas>\n'
+    '                <script>drawGridMap(document.getElementById("%(id)s"), %(data)s);</script>'
+)
+
+# Rutina de dibujo del backend canvas (se escribe una vez por reporte). Los
+# colores y grosores replican las clases CSS del mapa SVG.
+_CANVAS_SCRIPT = """<script>
+        function drawGridMap(canvas, map) {
+            const ctx = canvas.getContext("2d");
+            const cols = map.cols, count = map.cols * map.rows, half = map.cell / 2;
+            const px = i => (i % cols) * map.cell + half;
+            const py = i => Math.floor(i / cols) * map.cell + half;
+            const blocked = new Set(map.blocked.map(([a, b]) => a * count + b));
+            const closed = new Set(map.closed);
+            const onRoute = new Set(map.route);
+            const segment = (a, b) => { ctx.moveTo(px(a), py(a)); ctx.lineTo(px(b), py(b)); };
+            const dot = (i, r) => { ctx.moveTo(px(i) + r, py(i)); ctx.arc(px(i), py(i), r, 0, 2 * Math.PI); };
+            const paint = (fill, stroke, width, dash) => {
+                if (fill) { ctx.fillStyle = fill; ctx.fill(); }
+                ctx.strokeStyle = stroke; ctx.lineWidth = width; ctx.setLineDash(dash || []); ctx.stroke();
+            };
+            
+            // Carreteras transitables (derecha e inferior de cada intersección)
+            ctx.beginPath();
+            for (let i = 0; i < count; i++) {
+                if (i % cols < cols - 1 && !blocked.has(i * count + i + 1)) segment(i, i + 1);
+                if (i + cols < count && !blocked.has(i * count + i + cols)) segment(i, i + cols);
+            }
+            paint(null, "#bbb", 2);
+            
+            // Ruta
+            ctx.beginPath();
+            map.route.forEach((i, k) => k ? ctx.lineTo(px(i), py(i)) : ctx.moveTo(px(i), py(i)));
+            ctx.lineCap = ctx.lineJoin = "round";
+            paint(null, "#3498db", 3);
+            ctx.lineCap = "butt"; ctx.lineJoin = "miter";
+            
+            // Intersecciones fuera de la ruta
+            ctx.beginPath();
+            for (let i = 0; i < count; i++) if (!closed.has(i) && !onRoute.has(i)) dot(i, 3);
+            paint("#f5f7fa", "#999", 1);
+            
+            // Carreteras bloqueadas
+            ctx.beginPath();
+            map.blocked.forEach(([a, b]) => segment(a, b));
+            paint(null, "#ff4444", 3, [4, 4]);
+            
+            // Intersecciones de la ruta
+            ctx.beginPath();
+            onRoute.forEach(i => { if (!closed.has(i)) dot(i, 3); });
+            paint("#e8f4f8", "#3498db", 2);
+            
+            // POIs y etiquetas
+            ctx.font = "bold 12px 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif";
+            ctx.textAlign = "center";
+            map.pois.forEach(([i, delivery, name]) => {
+                ctx.beginPath();
+                dot(i, 8);
+                paint(delivery ? "#27ae60" : "#e74c3c", delivery ? "#229954" : "#c0392b", 2);
+                ctx.fillStyle = "#333";
+                ctx.fillText(name, px(i), py(i) + 18);
+            });
+        }
+        </script>
+        """
+
+# Backends de dibujo del mapa disponibles
+_MAP_BACKENDS = ("svg", "canvas")
+
+# Tamaño del buffer de escritura del archivo de salida
+_WRITE_BUFFER_SIZE = 1 << 16
+
+
+def _format_coord(value: float) -> str:
+    """Formatea una coordenada SVG con un decimal como máximo ("25.0" -> "25")"""
+    text = '%.1f' % value
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _format_length(value: float) -> str:
+    """
+    Formatea una medida del mosaico de intersecciones con precisión completa
     
-    def _generate_canvas(self, grid_route, is_secondary: bool = False) -> str:
-        """Genera elementos SVG del mapa del grid"""
-        elements = []
-        route_path_set = set(grid_route.full_path)
-        route_edges = set()
-        
-        # Construir conjunto de aristas en la ruta usando full_path (intersecciones)
-        for i in range(len(grid_route.full_path) - 1):
-            route_edges.add((grid_route.full_path[i], grid_route.full_path[i + 1]))
-            route_edges.add((grid_route.full_path[i + 1], grid_route.full_path[i]))
-        
-        # Dibujar carreteras normales primero (fondo)
-        for (from_id, to_id), road in self.road_grid.roads.items():
-            if to_id > from_id:  # Evitar duplicados
-                from_intersection = road.from_intersection
-                to_intersection = road.to_intersection
-                
-                # Solo dibujar carreteras NO bloqueadas aquí
-                if road.is_passable:
-                    is_in_route = (from_id, to_id) in route_edges
-                    class_attr = "route-road" if is_in_route else "road"
-                    
-                    if is_secondary and is_in_route:
-                        class_attr += " secondary"
-                    
-                    line = f'''            <line x1="{from_intersection.pixel_x}" y1="{from_intersection.pixel_y}"
-                       x2="{to_intersection.pixel_x}" y2="{to_intersection.pixel_y}"
-                       class="{class_attr}"/>'''
-                    elements.append(line)
-        
-        # Dibujar carreteras bloqueadas DESPUÉS (superpuesta, siempre visible)
-        for (from_id, to_id), road in self.road_grid.roads.items():
-            if to_id > from_id:  # Evitar duplicados
-                if not road.is_passable:  # Solo las bloqueadas
-                    from_intersection = road.from_intersection
-                    to_intersection = road.to_intersection
-                    
-                    line = f'''            <line x1="{from_intersection.pixel_x}" y1="{from_intersection.pixel_y}"
-                       x2="{to_intersection.pixel_x}" y2="{to_intersection.pixel_y}"
-                       class="road-blocked"/>'''
-                    elements.append(line)
-        
-        # Dibujar intersecciones
-        for intersection in self.road_grid.intersections.values():
-            if intersection.is_passable:
-                class_attr = "intersection-active" if intersection.intersection_id in route_path_set else "intersection"
-                
-                if is_secondary and intersection.intersection_id in route_path_set:
-                    class_attr += " secondary"
-                
-                circle = f'''            <circle cx="{intersection.pixel_x}" cy="{intersection.pixel_y}" r="3"
-                    class="{class_attr}"/>'''
-                elements.append(circle)
+    El patrón se repite una vez por celda: redondear su tamaño a un decimal
+    acumularía el error y desplazaría los puntos lejanos de sus intersecciones.
+    """
+    text = repr(float(value))
+    return text[:-2] if text.endswith('.0') else text
+
+
+class GridHTMLRenderer:
+    """Renderizador HTML mejorado para grid de carreteras"""
+    
+    def __init__(self, road_grid, config):
+        self.road_grid = road_grid
+        self.config = config
+    
+    @cached_property
+    def _coordinate_labels(self) -> Tuple[List[str], List[str]]:
+        """
+        Coordenadas (x, y) de cada intersección ya formateadas, por índice denso
+        
+        En el grid regular x solo depende de la columna e y de la fila: se
+        formatea un valor por columna y por fila y se replican.
+        """
+        grid = self.road_grid
+        width, height = grid.grid_width, grid.grid_height
+        column_labels = [_format_coord(grid.pixel_x[x]) for x in range(width)]
+        row_labels = [_format_coord(grid.pixel_y[y * width]) for y in range(height)]
+        return column_labels * height, [label for label in row_labels for _ in range(width)]
+    
+    def render_route(self, grid_route: OptimizedRoute, output_file: str = "output.html",
+                     backend: str = "svg") -> None:
+        """
+        Renderiza la ruta en un archivo HTML
+        
+        Args:
+            grid_route: Ruta a dibujar
+            output_file: Archivo HTML de salida
+            backend: "svg" (por defecto) o "canvas", más liviano para grids muy grandes
+        """
+        self._check_backend(backend)
+        self._write_html_file(output_file, grid_route, None, backend)
+    
+    def render_comparison(self, primary_route: OptimizedRoute, secondary_route: OptimizedRoute, 
+                         output_file: str = "output.html", backend: str = "svg") -> None:
+        """Renderiza dos rutas para comparación (ver render_route para `backend`)"""
+        self._check_backend(backend)
+        self._write_html_file(output_file, primary_route, secondary_route, backend)
+    
+    def _write_html_file(self, output_file: str, primary_route: OptimizedRoute,
+                         secondary_route: Optional[OptimizedRoute], backend: str) -> None:
+        """
+        Escribe el reporte en `output_file` sin dejarlo nunca a medias
+        
+        El HTML se vuelca a un temporal del mismo directorio y solo al terminar
+        reemplaza al destino con os.replace (atómico en el mismo sistema de
+        archivos). Si el renderizado falla, se borra el temporal y el archivo
+        anterior, si existía, queda intacto.
+        """
+        temp_file = "%s.%d.tmp" % (output_file, os.getpid())
+        try:
+            with open(temp_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                self._write_html(f, primary_route, secondary_route, backend)
+            os.replace(temp_file, output_file)
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+    
+    def _generate_html(self, primary_route: OptimizedRoute, secondary_route: Optional[OptimizedRoute] = None,
+                       backend: str = "svg") -> str:
+        """Genera contenido HTML con una o dos rutas"""
+        self._check_backend(backend)
+        buffer = io.StringIO()
+        self._write_html(buffer, primary_route, secondary_route, backend)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _check_backend(backend: str) -> None:
+        """Valida el backend de dibujo antes de abrir el archivo de salida"""
+        if backend not in _MAP_BACKENDS:
+            raise ValueError(f"Backend de mapa desconocido: {backend}. "
+                           f"Disponibles: {list(_MAP_BACKENDS)}")
+    
+    def _write_html(self, out: TextIO, primary_route: OptimizedRoute,
+                    secondary_route: Optional[OptimizedRoute] = None, backend: str = "svg") -> None:
+        """
+        Escribe el HTML con una o dos rutas directamente en `out`
+        
+        Cada elemento del mapa se escribe a medida que se genera, sin armar
+        el documento completo en memoria.
+        """
+        out.write(_HTML_HEAD)
+        out.write(_BODY_OPEN)
+        if backend == "canvas":
+            out.write(_CANVAS_SCRIPT)
+        
+        # Sección primaria
+        self._write_section(out, primary_route, _PRIMARY_SECTION_OPEN, _PRIMARY_SECTION_CLOSE,
+                            self._section_context(primary_route), False, backend)
+        out.write(_BODY_BETWEEN)
+        
+        # Sección secundaria (si existe)
+        if secondary_route:
+            context = self._section_context(secondary_route)
+            context["iterations"] = (
+                _ITERATIONS_TEMPLATE.format(iterations=secondary_route.iterations)
+                if secondary_route.iterations > 0 else ""
+            )
+            self._write_section(out, secondary_route, _SECONDARY_SECTION_OPEN, _SECONDARY_SECTION_CLOSE,
+                                context, True, backend)
+        
+        out.write(_BODY_CLOSE)
+    
+    def _write_section(self, out: TextIO, grid_route, section_open: str, section_close: str,
+                       context: dict, is_secondary: bool, backend: str = "svg") -> None:
+        """Escribe una sección de ruta con su mapa"""
+        out.write(section_open.format(**context))
+        if backend == "canvas":
+            out.write(self._generate_canvas_map(grid_route, is_secondary))
+        else:
+            self._write_svg_map(out, grid_route, is_secondary)
+        out.write(section_close)
+    
+    def _write_svg_map(self, out: TextIO, grid_route, is_secondary: bool) -> None:
+        """Escribe el mapa SVG de una ruta, elemento por elemento"""
+        write = out.write
+        min_x, min_y, max_x, max_y = self.road_grid.get_grid_bounds()
+        write(_SVG_MAP_OPEN % f"{min_x} {min_y} {max_x} {max_y}")
+        
+        elements = self._iter_canvas_elements(grid_route, is_secondary)
+        write(next(elements, ""))
+        for element in elements:
+            write("\n")
+            write(element)
         
-        # Dibujar POIs
+        write(_SVG_MAP_CLOSE)
+    
+    def _generate_canvas_map(self, grid_route, is_secondary: bool) -> str:
+        """
+        Genera el mapa de una ruta como <canvas> dibujado por drawGridMap
+        
+        Las carreteras transitables y los puntos de intersección se derivan del
+        tamaño del grid en el navegador; solo viajan en el JSON los bloqueos,
+        la ruta y los POIs.
+        """
+        grid = self.road_grid
+        data = {
+            "cols": grid.grid_width,
+            "rows": grid.grid_height,
+            "cell": grid.cell_size,
+            "blocked": [[a, b] for a, b in grid.iter_blocked()],
+            "closed": [idx for idx, passable in enumerate(grid.intersection_passable) if not passable],
+            "route": list(self._route_indices(grid_route)),
+            "pois": [[idx, int(poi_class != "poi-marker"), name] for idx, poi_class, name in self._iter_pois()],
+        }
+        _, _, max_x, max_y = grid.get_grid_bounds()
+        return _CANVAS_MAP_TMPL % {
+            "id": "map-secondary" if is_secondary else "map-primary",
+            "width": _format_coord(max_x),
+            "height": _format_coord(max_y),
+            # "</" escapado para que ningún nombre cierre el <script>
+            "data": json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/"),
+        }
+    
+    def _route_indices(self, grid_route):
+        """Intersecciones de la ruta (full_path) como índices densos del grid"""
+        if grid_route.full_path_indices is not None:
+            return grid_route.full_path_indices
+        id_to_idx = self.road_grid.id_to_idx
+        return [id_to_idx[inter_id] for inter_id in grid_route.full_path]
+    
+    def _iter_pois(self) -> Iterator[Tuple[int, str, str]]:
+        """Itera los POIs del grid como (índice de intersección, clase CSS, nombre)"""
+        id_to_idx = self.road_grid.id_to_idx
         for poi_id, intersection_id in self.road_grid.poi_map.items():
-            intersection = self.road_grid.intersections.get(intersection_id)
-            if intersection:
+            idx = id_to_idx.get(intersection_id)
+            if idx is not None:
                 # Obtener tipo de POI
-                node_data = next((n for n in self.config.get_nodes() if n["id"] == poi_id), None)
+                node_data = self.config.get_node_by_id(poi_id)
                 node_type = node_data["type"] if node_data else "delivery"
                 
                 poi_class = "poi-marker"
@@ -448,9 +645,93 @@ class GridHTMLRenderer:
                 # Obtener nombre corto
                 name = node_data["name"] if node_data else poi_id
                 
-                circle = f'''            <circle cx="{intersection.pixel_x}" cy="{intersection.pixel_y}" r="8"
-                    class="{poi_class}"/>
-            <text x="{intersection.pixel_x}" y="{intersection.pixel_y + 18}" class="poi-label">{name}</text>'''
-                elements.append(circle)
-        
-        return "\n".join(elements)
+                yield idx, poi_class, name
+    
+    def _section_context(self, grid_route) -> dict:
+        """Valores comunes para las plantillas de sección"""
+        return {
+            "algorithm": grid_route.algorithm_name,
+            "distance": grid_route.total_distance,
+            "intersection_count": len(grid_route.full_path),
+            "deliveries": len(grid_route.path) - 1,
+            "poi_sequence": " → ".join(grid_route.path),
+        }
+    
+    def _iter_canvas_elements(self, grid_route, is_secondary: bool = False) -> Iterator[str]:
+        """Genera uno a uno los elementos SVG del mapa del grid"""
+        grid = self.road_grid
+        # Las coordenadas no cambian: se formatean una vez y se reutilizan en
+        # cada tramo, círculo y canvas
+        coord_x, coord_y = self._coordinate_labels
+        
+        # Intersecciones y aristas de la ruta (full_path)
+        route_indices = self._route_indices(grid_route)
+        # Cada arista se empaqueta en un único entero (menor << 32 | mayor)
+        route_edges = {
+            (a << 32) | b if a < b else (b << 32) | a
+            for a, b in zip(route_indices, route_indices[1:])
+        }
+        
+        route_road_class = "route-road secondary" if is_secondary else "route-road"
+        active_class = "intersection-active secondary" if is_secondary else "intersection-active"
+        
+        # Carreteras normales al fondo, la ruta encima, el mosaico de intersecciones
+        # (sin las cerradas), las bloqueadas superpuestas (siempre visibles) y
+        # luego las intersecciones de la ruta.
+        # Cada clase de carretera se dibuja como un único <path> con un subtrazo
+        # "M..L.." por tramo. La partición de tramos la mantiene el grid.
+        road_d, route_d = [], []
+        for a, b in grid.iter_passable():
+            (route_d if (a << 32) | b in route_edges else road_d).append(
+                _SEGMENT_TMPL % (coord_x[a], coord_y[a], coord_x[b], coord_y[b]))
+        blocked_d = [
+            _SEGMENT_TMPL % (coord_x[a], coord_y[a], coord_x[b], coord_y[b])
+            for a, b in grid.iter_blocked()
+        ]
+        
+        for path_d, road_class in ((road_d, "road"), (route_d, route_road_class)):
+            if path_d:
+                yield _ROAD_PATH_TMPL % ("".join(path_d), road_class)
+        
+        _, _, max_x, max_y = grid.get_grid_bounds()
+        dots_id = "grid-dots-secondary" if is_secondary else "grid-dots"
+        width, height = _format_length(max_x), _format_length(max_y)
+        passable = grid.intersection_passable
+        holes = "".join([
+            _GRID_DOTS_HOLE_TMPL % (coord_x[idx], coord_y[idx])
+            for idx, is_passable in enumerate(passable) if not is_passable
+        ])
+        mask, mask_ref = "", ""
+        if holes:
+            mask_id = dots_id + "-mask"
+            mask = _GRID_DOTS_MASK_TMPL % {"id": mask_id, "width": width, "height": height, "holes": holes}
+            mask_ref = ' mask="url(#%s)"' % mask_id
+        yield _GRID_DOTS_TMPL % {
+            "id": dots_id,
+            "cell": _format_length(grid.cell_size),
+            "center": _format_length(grid.cell_size / 2),
+            "width": width,
+            "height": height,
+            "mask": mask,
+            "mask_ref": mask_ref,
+        }
+        
+        if blocked_d:
+            yield _ROAD_PATH_TMPL % ("".join(blocked_d), "road-blocked")
+        
+        # Solo las intersecciones de la ruta llevan su propio círculo; las ya
+        # dibujadas se marcan en un bitmap por índice denso (sin hashing)
+        drawn = bytearray(len(passable))
+        for idx in route_indices:
+            if passable[idx] and not drawn[idx]:
+                drawn[idx] = 1
+                yield _INTERSECTION_TMPL % (coord_x[idx], coord_y[idx], active_class)
+        
+        # Dibujar POIs: marcadores y etiquetas en un solo bloque
+        pixel_y = grid.pixel_y
+        pois = "\n".join([
+            _POI_TMPL % (coord_x[idx], coord_y[idx], poi_class, coord_x[idx], _format_coord(pixel_y[idx] + 18), name)
+            for idx, poi_class, name in self._iter_pois()
+        ])
+        if pois:
+            yield pois
@@ -1,7 +1,18 @@
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+import sys
+from array import array
+from math import isclose
+from typing import Dict, Iterator, List, Set, Tuple, Optional
+from dataclasses import InitVar, dataclass, field
+from functools import cached_property
 from enum import Enum
 
+# __slots__ en las dataclasses del grid (se crean miles): dataclass(slots=True)
+# existe desde Python 3.10; en versiones anteriores se mantiene el __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Tolerancia relativa para considerar iguales dos longitudes de carretera
+_UNIFORM_LENGTH_REL_TOL = 1e-9
+
 class Direction(Enum):
     """Direcciones posibles en el grid"""
     NORTH = (0, -1)
@@ -13,31 +24,79 @@ class Direction(Enum):
     SOUTHEAST = (1, 1)
     SOUTHWEST = (-1, 1)
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class GridIntersection:
     """Representa una intersección en el grid de carreteras"""
     grid_x: int
     grid_y: int
     pixel_x: float  # Coordenada en píxeles para renderización
     pixel_y: float
-    is_passable: bool = True  # Para construcciones o bloqueos
+    is_passable: InitVar[bool] = True  # Para construcciones o bloqueos
     intersection_id: str = None
+    # Grid dueño y posición en RoadGrid.intersection_passable, donde vive el estado
+    _grid: Optional["RoadGrid"] = field(default=None, repr=False, compare=False)
+    _index: int = field(default=0, repr=False, compare=False)
+    # Estado propio mientras no pertenece a ningún grid
+    _passable: bool = field(default=True, init=False, repr=False, compare=False)
     
-    def __post_init__(self):
+    def __post_init__(self, is_passable: bool):
         if self.intersection_id is None:
             self.intersection_id = f"grid_{self.grid_x}_{self.grid_y}"
+        if not is_passable:
+            self._set_passable(False)
+    
+    def _get_passable(self) -> bool:
+        """Lee la transitabilidad del grid dueño (o la propia si no tiene)"""
+        grid = self._grid
+        return self._passable if grid is None else bool(grid.intersection_passable[self._index])
+    
+    def _set_passable(self, value: bool):
+        """Escribe la transitabilidad en el grid dueño con block_/unblock_intersection"""
+        grid = self._grid
+        if grid is None:
+            self._passable = bool(value)
+        elif value:
+            grid.unblock_intersection(self.intersection_id)
+        else:
+            grid.block_intersection(self.intersection_id)
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class GridRoad:
     """Representa una carretera entre dos intersecciones en el grid"""
     from_intersection: GridIntersection
     to_intersection: GridIntersection
-    is_passable: bool = True
+    is_passable: InitVar[bool] = True
     road_segment_id: str = None
+    # Grid dueño y posición de su primera arista en RoadGrid.edge_passable
+    _grid: Optional["RoadGrid"] = field(default=None, repr=False, compare=False)
+    _index: int = field(default=0, repr=False, compare=False)
+    # Estado propio mientras no pertenece a ningún grid
+    _passable: bool = field(default=True, init=False, repr=False, compare=False)
     
-    def __post_init__(self):
+    def __post_init__(self, is_passable: bool):
         if self.road_segment_id is None:
             self.road_segment_id = f"segment_{self.from_intersection.intersection_id}_{self.to_intersection.intersection_id}"
+        if not is_passable:
+            self._set_passable(False)
+    
+    def _get_passable(self) -> bool:
+        """Lee la transitabilidad del grid dueño (o la propia si no tiene)"""
+        grid = self._grid
+        return self._passable if grid is None else bool(grid.edge_passable[self._index])
+    
+    def _set_passable(self, value: bool):
+        """Escribe la transitabilidad en ambas aristas del CSR del grid dueño"""
+        grid = self._grid
+        if grid is None:
+            self._passable = bool(value)
+        else:
+            grid._set_road_passable(self, bool(value))
+
+# is_passable es argumento del constructor (InitVar) y, una vez creada la
+# instancia, una propiedad que lee y escribe el estado en los arrays del grid,
+# la única copia: cambiarla equivale a block_*/unblock_* e incrementa `version`
+GridIntersection.is_passable = property(GridIntersection._get_passable, GridIntersection._set_passable)
+GridRoad.is_passable = property(GridRoad._get_passable, GridRoad._set_passable)
 
 class RoadGrid:
     """Grafo de grid complejo que representa la red de carreteras con intersecciones"""
@@ -55,47 +114,171 @@ class RoadGrid:
         self.grid_height = grid_height
         self.cell_size = cell_size
         self.intersections: Dict[str, GridIntersection] = {}
+        # Una sola carretera por par de intersecciones, con clave canónica (ver _road_key)
         self.roads: Dict[Tuple[str, str], GridRoad] = {}
         self.poi_map: Dict[str, str] = {}  # Mapea POI a intersecciones
+        # Intersecciones bloqueadas, mantenidas por block_/unblock_intersection
+        # (las carreteras bloqueadas salen de la partición de tramos, ver iter_blocked)
+        self.blocked_intersections: Set[str] = set()
+        # Versión del estado de bloqueos: se incrementa con cada cambio, y
+        # get_blocked_state reutiliza su clave mientras no cambie
+        self.version = 0
+        self._blocked_state: Optional[Tuple[int, Tuple[frozenset, frozenset]]] = None
+        # Lista de adyacencia: intersección -> [(vecino, distancia, carretera)]
+        self.adjacency: Dict[str, List[Tuple[str, float, GridRoad]]] = {}
+        
+        # Índice denso de intersecciones (fila por fila) y coordenadas en arrays paralelos
+        self.idx_to_id: List[str] = []
+        self.id_to_idx: Dict[str, int] = {}
+        self.pixel_x = array('d')
+        self.pixel_y = array('d')
+        # Transitabilidad de cada intersección (1/0), mantenida por block_/unblock_intersection;
+        # GridIntersection.is_passable la lee de aquí
+        self.intersection_passable = bytearray()
+        
+        # Vecindad por índices en formato CSR para los algoritmos de caminos mínimos:
+        # las aristas dirigidas que salen de idx son edge_offsets[idx]..edge_offsets[idx + 1] - 1,
+        # con destino edge_to, peso edge_weight y transitabilidad edge_passable (1/0),
+        # esta última mantenida por block_road/unblock_road (GridRoad.is_passable la lee de aquí)
+        self.edge_offsets = array('i', [0])
+        self.edge_to = array('i')
+        self.edge_weight = array('d')
+        self.edge_passable = bytearray()
+        # road_segment_id -> posiciones de sus dos aristas dirigidas en el CSR
+        self._road_edges: Dict[str, List[int]] = {}
+        # (versión, (vecinos, pesos)) transitables por índice; ver get_passable_neighbors
+        self._passable_neighbors: Optional[Tuple[int, Tuple[List[List[int]], List[List[float]]]]] = None
+        
+        # Un tramo por carretera física (sin duplicar el sentido inverso);
+        # segment_from[k] < segment_to[k] siempre (vecino derecho o inferior)
+        # y los tramos quedan ordenados por segment_from
+        self.segments: List[GridRoad] = []
+        self.segment_from = array('i')
+        self.segment_to = array('i')
+        # Partición (transitables, bloqueados) de índices de tramo; se
+        # reconstruye solo cuando block_road/unblock_road la invalidan
+        self._segment_partition: Optional[Tuple[List[int], List[int]]] = None
         
         self._create_grid()
+        self._build_csr()
+        
+        # Longitud común de todas las carreteras (None si no son uniformes); con
+        # cell_size fraccionario las longitudes difieren en ruido de punto
+        # flotante, así que se comparan con tolerancia relativa
+        lengths = set(self.edge_weight)
+        first_length = next(iter(lengths), None)
+        self.uniform_road_length: Optional[float] = first_length if lengths and all(
+            isclose(length, first_length, rel_tol=_UNIFORM_LENGTH_REL_TOL) for length in lengths
+        ) else None
     
     def _create_grid(self):
         """Crea el grid base de intersecciones"""
+        # Las coordenadas solo dependen de la columna o de la fila: se calculan
+        # una vez por columna/fila y se replican (índice denso = y * ancho + x)
+        half_cell = self.cell_size / 2
+        column_x = array('d', [x * self.cell_size + half_cell for x in range(self.grid_width)])
+        row_y = array('d', [y * self.cell_size + half_cell for y in range(self.grid_height)])
+        self.pixel_x = column_x * self.grid_height
+        self.pixel_y = array('d', [pixel_y for pixel_y in row_y for _ in range(self.grid_width)])
+        self.intersection_passable = bytearray(b'\x01') * (self.grid_width * self.grid_height)
+        
         # Primero crear todas las intersecciones
         for y in range(self.grid_height):
             for x in range(self.grid_width):
                 intersection = GridIntersection(
                     grid_x=x,
                     grid_y=y,
-                    pixel_x=x * self.cell_size + self.cell_size / 2,
-                    pixel_y=y * self.cell_size + self.cell_size / 2
+                    pixel_x=column_x[x],
+                    pixel_y=row_y[y],
+                    _grid=self,
+                    _index=len(self.idx_to_id)
                 )
                 self.intersections[intersection.intersection_id] = intersection
+                self.adjacency[intersection.intersection_id] = []
+                self.id_to_idx[intersection.intersection_id] = len(self.idx_to_id)
+                self.idx_to_id.append(intersection.intersection_id)
         
-        # Luego crear las carreteras entre intersecciones
+        # Luego crear las carreteras entre intersecciones, resolviendo vecinos
+        # por índice en lugar de volver a formatear sus IDs
+        grid = [self.intersections[inter_id] for inter_id in self.idx_to_id]
+        width = self.grid_width
         for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                current_id = f"grid_{x}_{y}"
-                current = self.intersections[current_id]
+            for x in range(width):
+                idx = y * width + x
+                current = grid[idx]
                 
                 # Crear carreteras horizontales
-                if x < self.grid_width - 1:
-                    right_id = f"grid_{x+1}_{y}"
-                    right_intersection = self.intersections[right_id]
-                    road = GridRoad(current, right_intersection)
-                    self.roads[(current_id, right_id)] = road
-                    # Carretera bidireccional
-                    self.roads[(right_id, current_id)] = GridRoad(right_intersection, current)
+                if x < width - 1:
+                    self._connect(current, grid[idx + 1])
                 
                 # Crear carreteras verticales
                 if y < self.grid_height - 1:
-                    down_id = f"grid_{x}_{y+1}"
-                    down_intersection = self.intersections[down_id]
-                    road = GridRoad(current, down_intersection)
-                    self.roads[(current_id, down_id)] = road
-                    # Carretera bidireccional
-                    self.roads[(down_id, current_id)] = GridRoad(down_intersection, current)
+                    self._connect(current, grid[idx + width])
+    
+    def _connect(self, intersection_a: GridIntersection, intersection_b: GridIntersection):
+        """
+        Crea una carretera bidireccional entre dos intersecciones
+        
+        Se guarda una única GridRoad (a -> b, con a antes que b en el grid)
+        compartida por ambos sentidos en la lista de adyacencia.
+        """
+        a_id = intersection_a.intersection_id
+        b_id = intersection_b.intersection_id
+        road = GridRoad(intersection_a, intersection_b)
+        self.roads[(a_id, b_id)] = road
+        
+        # La distancia euclidiana es fija para el grid, se calcula una sola vez
+        distance = ((intersection_a.pixel_x - intersection_b.pixel_x) ** 2 + 
+                    (intersection_a.pixel_y - intersection_b.pixel_y) ** 2) ** 0.5
+        self.adjacency[a_id].append((b_id, distance, road))
+        self.adjacency[b_id].append((a_id, distance, road))
+        
+        self.segments.append(road)
+        self.segment_from.append(self.id_to_idx[a_id])
+        self.segment_to.append(self.id_to_idx[b_id])
+    
+    def _build_csr(self):
+        """
+        Aplana la lista de adyacencia en los arrays CSR (mismo orden de vecinos)
+        
+        Cada GridRoad queda leyendo su transitabilidad de la primera de sus
+        dos aristas dirigidas; block_road/unblock_road actualizan ambas.
+        """
+        id_to_idx = self.id_to_idx
+        for inter_id in self.idx_to_id:
+            for to_id, distance, road in self.adjacency[inter_id]:
+                edges = self._road_edges.setdefault(road.road_segment_id, [])
+                if not edges:
+                    road._grid = self
+                    road._index = len(self.edge_to)
+                edges.append(len(self.edge_to))
+                self.edge_to.append(id_to_idx[to_id])
+                self.edge_weight.append(distance)
+                self.edge_passable.append(1)
+            self.edge_offsets.append(len(self.edge_to))
+    
+    @cached_property
+    def manhattan_admissible(self) -> bool:
+        """
+        Indica si ninguna carretera es más corta que la distancia Manhattan entre sus extremos
+        
+        En ese caso la distancia Manhattan en píxeles es una cota inferior
+        consistente de cualquier camino (heurística de A*). Las longitudes no
+        cambian tras construir el grid, así que se comprueba una sola vez.
+        """
+        pixel_x, pixel_y, offsets = self.pixel_x, self.pixel_y, self.edge_offsets
+        sources = (idx for idx in range(len(self.idx_to_id)) for _ in range(offsets[idx], offsets[idx + 1]))
+        return all(
+            weight >= abs(pixel_x[a] - pixel_x[b]) + abs(pixel_y[a] - pixel_y[b])
+            for a, b, weight in zip(sources, self.edge_to, self.edge_weight)
+        )
+    
+    def _road_key(self, from_id: str, to_id: str) -> Tuple[str, str]:
+        """Clave canónica de la carretera entre dos intersecciones (en orden del grid)"""
+        id_to_idx = self.id_to_idx
+        if from_id in id_to_idx and to_id in id_to_idx and id_to_idx[to_id] < id_to_idx[from_id]:
+            return to_id, from_id
+        return from_id, to_id
     
     def add_poi(self, poi_id: str, grid_x: int, grid_y: int) -> str:
         """
@@ -130,18 +313,38 @@ class RoadGrid:
         Returns:
             Lista de tuplas (intersection_id, distancia)
         """
-        neighbors = []
-        for (from_id, to_id), road in self.roads.items():
-            if from_id == intersection_id and road.is_passable:
-                # Validar que la intersección destino también sea accesible
-                to_intersection = self.intersections[to_id]
-                if to_intersection.is_passable:
-                    # Calcular distancia euclidiana
-                    from_intersection = self.intersections[from_id]
-                    distance = ((from_intersection.pixel_x - to_intersection.pixel_x) ** 2 + 
-                               (from_intersection.pixel_y - to_intersection.pixel_y) ** 2) ** 0.5
-                    neighbors.append((to_id, distance))
-        return neighbors
+        intersections = self.intersections
+        return [
+            (to_id, distance)
+            for to_id, distance, road in self.adjacency.get(intersection_id, ())
+            # Validar que la intersección destino también sea accesible
+            if road.is_passable and intersections[to_id].is_passable
+        ]
+    
+    def get_passable_neighbors(self) -> Tuple[List[List[int]], List[List[float]]]:
+        """
+        Vecindad transitable de cada intersección para el estado actual de bloqueos
+        
+        Filtra el CSR una sola vez (carretera e intersección destino
+        transitables) y reutiliza el resultado mientras `version` no cambie,
+        así los recorridos de caminos mínimos iteran listas ya depuradas sin
+        volver a comprobar bloqueos en cada arista.
+        
+        Returns:
+            Tupla (vecinos, pesos): para cada índice denso, las intersecciones
+            vecinas accesibles y la distancia a cada una, en el orden del CSR
+        """
+        if self._passable_neighbors is None or self._passable_neighbors[0] != self.version:
+            offsets, edge_to, edge_weight = self.edge_offsets, self.edge_to, self.edge_weight
+            edge_passable, passable = self.edge_passable, self.intersection_passable
+            neighbors, weights = [], []
+            for idx in range(len(self.idx_to_id)):
+                edges = [e for e in range(offsets[idx], offsets[idx + 1])
+                         if edge_passable[e] and passable[edge_to[e]]]
+                neighbors.append([edge_to[e] for e in edges])
+                weights.append([edge_weight[e] for e in edges])
+            self._passable_neighbors = (self.version, (neighbors, weights))
+        return self._passable_neighbors[1]
     
     def block_road(self, from_id: str, to_id: str):
         """
@@ -151,11 +354,10 @@ class RoadGrid:
             from_id: ID de intersección de origen
             to_id: ID de intersección de destino
         """
-        # Bloquear carreteras en ambas direcciones
-        if (from_id, to_id) in self.roads:
-            self.roads[(from_id, to_id)].is_passable = False
-        if (to_id, from_id) in self.roads:
-            self.roads[(to_id, from_id)].is_passable = False
+        # La carretera es única para ambas direcciones
+        road = self.roads.get(self._road_key(from_id, to_id))
+        if road:
+            self._set_road_passable(road, False)
         
         # Bloquear la intersección destino para prevenir cruces perpendiculares
         self.block_intersection(to_id)
@@ -168,30 +370,89 @@ class RoadGrid:
             from_id: ID de intersección de origen
             to_id: ID de intersección de destino
         """
-        # Desbloquear carreteras en ambas direcciones
-        if (from_id, to_id) in self.roads:
-            self.roads[(from_id, to_id)].is_passable = True
-        if (to_id, from_id) in self.roads:
-            self.roads[(to_id, from_id)].is_passable = True
+        # La carretera es única para ambas direcciones
+        road = self.roads.get(self._road_key(from_id, to_id))
+        if road:
+            self._set_road_passable(road, True)
         
         # Desbloquear la intersección
-        if to_id in self.intersections:
-            self.intersections[to_id].is_passable = True
+        self.unblock_intersection(to_id)
+    
+    def _set_road_passable(self, road: GridRoad, passable: bool):
+        """Marca una carretera (sus dos aristas del CSR) como transitable o bloqueada"""
+        flag = 1 if passable else 0
+        for e in self._road_edges[road.road_segment_id]:
+            self.edge_passable[e] = flag
+        self._segment_partition = None
+        self.version += 1
+    
+    def block_roads(self, road_pairs: List[Tuple[str, str]]):
+        """Bloquea varias carreteras [(from_id, to_id), ...] en un solo llamado"""
+        for from_id, to_id in road_pairs:
+            self.block_road(from_id, to_id)
     
     def block_intersection(self, intersection_id: str):
         """Bloquea una intersección (construcción, etc.)"""
         if intersection_id in self.intersections:
-            self.intersections[intersection_id].is_passable = False
+            self.intersection_passable[self.id_to_idx[intersection_id]] = 0
+            self.blocked_intersections.add(intersection_id)
+            self.version += 1
     
     def unblock_intersection(self, intersection_id: str):
         """Desbloquea una intersección"""
         if intersection_id in self.intersections:
-            self.intersections[intersection_id].is_passable = True
+            self.intersection_passable[self.id_to_idx[intersection_id]] = 1
+            self.blocked_intersections.discard(intersection_id)
+            self.version += 1
+    
+    def get_blocked_state(self) -> Tuple[frozenset, frozenset]:
+        """
+        Retorna el estado de bloqueos del grid como clave hashable
+        
+        Las carreteras salen de iter_blocked (la misma partición de tramos que
+        usa el renderizador) y las intersecciones del conjunto mantenido por
+        block_/unblock_intersection; se reutiliza mientras `version` no cambie.
+        
+        Returns:
+            Tupla (carreteras bloqueadas como pares de IDs en orden del grid,
+            intersecciones bloqueadas)
+        """
+        if self._blocked_state is None or self._blocked_state[0] != self.version:
+            idx_to_id = self.idx_to_id
+            roads = frozenset((idx_to_id[a], idx_to_id[b]) for a, b in self.iter_blocked())
+            state = (roads, frozenset(self.blocked_intersections))
+            self._blocked_state = (self.version, state)
+        return self._blocked_state[1]
+    
+    def get_segment_partition(self) -> Tuple[List[int], List[int]]:
+        """
+        Separa los tramos del grid según su estado de bloqueo
+        
+        Returns:
+            Tupla (índices de tramos transitables, índices de tramos bloqueados),
+            ambos en el orden de self.segments
+        """
+        if self._segment_partition is None:
+            passable, blocked = [], []
+            for k, road in enumerate(self.segments):
+                (passable if road.is_passable else blocked).append(k)
+            self._segment_partition = (passable, blocked)
+        return self._segment_partition
+    
+    def iter_passable(self) -> Iterator[Tuple[int, int]]:
+        """Itera los tramos transitables como (índice menor, índice mayor), una vez por carretera física"""
+        segment_from, segment_to = self.segment_from, self.segment_to
+        return ((segment_from[k], segment_to[k]) for k in self.get_segment_partition()[0])
+    
+    def iter_blocked(self) -> Iterator[Tuple[int, int]]:
+        """Itera los tramos bloqueados como (índice menor, índice mayor), una vez por carretera física"""
+        segment_from, segment_to = self.segment_from, self.segment_to
+        return ((segment_from[k], segment_to[k]) for k in self.get_segment_partition()[1])
     
     def get_grid_bounds(self) -> Tuple[float, float, float, float]:
         """Retorna los límites del grid en píxeles (min_x, min_y, max_x, max_y)"""
         return (0, 0, self.grid_width * self.cell_size, self.grid_height * self.cell_size)
     
     def get_road(self, from_id: str, to_id: str) -> Optional[GridRoad]:
-        """Obtiene una carretera específica"""
-        return self.roads.get((from_id, to_id))
+        """Obtiene la carretera entre dos intersecciones (en cualquier sentido)"""
+        return self.roads.get(self._road_key(from_id, to_id))
@@ -1,25 +1,48 @@
+from collections import OrderedDict
 from typing import List, Tuple
 from src.optimization_strategies import OptimizationStrategyFactory, OptimizedRoute
 
 class GridRouteOptimizer:
     """Optimizador de rutas para grid de carreteras"""
     
+    # Estados de bloqueo distintos cuyos caminos mínimos se conservan en caché
+    MAX_CACHED_STATES = 8
+    
     def __init__(self, road_grid):
         self.road_grid = road_grid
         self.factory = OptimizationStrategyFactory()
+        # Estado de bloqueos -> {índice de intersección origen: (distancias, predecesores, radio)}
+        self._shortest_path_cache: OrderedDict = OrderedDict()
     
     def optimize_route(self, start_poi: str, destination_pois: List[str], 
-                      strategy: str = "nearest_neighbor") -> OptimizedRoute:
+                      strategy: str = "nearest_neighbor", **strategy_kwargs) -> OptimizedRoute:
         """
         Calcula la ruta óptima desde un POI hacia múltiples destinos en el grid
         
+        Los caminos mínimos calculados se reutilizan entre llamadas mientras
+        no cambien las carreteras o intersecciones bloqueadas.
+        
         Args:
             start_poi: Punto de inicio (centro de distribución)
             destination_pois: Lista de destinos
-            strategy: Nombre de la estrategia ("nearest_neighbor", "two_opt", etc)
+            strategy: Nombre de la estrategia ("nearest_neighbor", "2opt", "ils", "held_karp", etc)
+            **strategy_kwargs: Parámetros adicionales para la estrategia
         
         Returns:
             OptimizedRoute con la ruta calculada
         """
-        strategy_instance = self.factory.create(strategy, self.road_grid)
+        strategy_instance = self.factory.create(strategy, self.road_grid, **strategy_kwargs)
+        strategy_instance.set_shortest_path_cache(self._get_shortest_path_cache())
         return strategy_instance.optimize(start_poi, destination_pois)
+    
+    def _get_shortest_path_cache(self) -> dict:
+        """Obtiene la caché de caminos mínimos para el estado actual del grid (LRU)"""
+        state = self.road_grid.get_blocked_state()
+        cache = self._shortest_path_cache.get(state)
+        if cache is None:
+            cache = self._shortest_path_cache[state] = {}
+            if len(self._shortest_path_cache) > self.MAX_CACHED_STATES:
+                self._shortest_path_cache.popitem(last=False)
+        else:
+            self._shortest_path_cache.move_to_end(state)
+        return cache
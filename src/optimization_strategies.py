@@ -4,13 +4,36 @@ Módulo de estrategias de optimización de rutas.
 Implementa diferentes algoritmos para optimizar rutas TSP:
 - Heurística de vecino más cercano (base)
 - 2-opt (local search - mejora rutas existentes)
+- Búsqueda local iterada (2-opt + perturbación double-bridge)
+- Held-Karp (programación dinámica exacta para pocos destinos)
 - Genético (futuro)
 """
 
-from typing import List, Dict, Tuple
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
-import heapq
+import multiprocessing
+import os
+import random
+import time
 from abc import ABC, abstractmethod
+from src.shortest_paths import (
+    SearchBuffers,
+    SweepResult,
+    astar_search,
+    init_sweep_worker,
+    run_sweep,
+    shortest_path_sweep,
+)
+
+# Trabajo mínimo (orígenes × intersecciones) para repartir los barridos de
+# caminos mínimos en procesos: por debajo, arrancar el pool cuesta más que
+# hacerlos en serie
+_PARALLEL_SWEEP_MIN_WORK = 500_000
+
+# Trabajo mínimo (reinicios × POIs²) para repartir los reinicios de 2-opt en
+# procesos: por debajo la búsqueda en serie termina antes de arrancar el pool
+_PARALLEL_TWO_OPT_MIN_WORK = 100_000
 
 
 @dataclass
@@ -21,6 +44,246 @@ class OptimizedRoute:
     total_distance: float
     algorithm_name: str
     iterations: int = 0  # Para 2-opt, cuántas iteraciones se realizaron
+    full_path_indices: Optional[array] = None  # full_path como índices densos del grid (int32)
+
+
+def two_opt_tour(tour: List[int], dist: List[List[float]], max_iterations: int) -> int:
+    """
+    Núcleo 2-Opt sobre índices enteros; modifica `tour` en el lugar
+    
+    Intenta revertir segmentos de la ruta para encontrar mejoras. Para cada
+    par de posiciones (i, j), evalúa el cambio de distancia al revertir el
+    segmento entre ellas y mantiene el cambio si mejora. El delta se calcula
+    en O(1) con sumas prefijas de la ruta, sin reconstruirla.
+    
+    Args:
+        tour: Ruta como lista de índices (el primero es fijo)
+        dist: Matriz de distancias indexada por índice
+        max_iterations: Máximo de pasadas de mejora
+    
+    Returns:
+        Número de iteraciones realizadas
+    """
+    n = len(tour)
+    forward = [0.0] * n
+    backward = [0.0] * n
+    improved = True
+    iteration = 0
+    
+    while improved and iteration < max_iterations:
+        improved = False
+        iteration += 1
+        
+        # Costo acumulado de la ruta en sentido directo e inverso, para
+        # obtener el costo del segmento revertido (la matriz puede no ser simétrica)
+        for k in range(1, n):
+            prev, curr = tour[k - 1], tour[k]
+            forward[k] = forward[k - 1] + dist[prev][curr]
+            backward[k] = backward[k - 1] + dist[curr][prev]
+        
+        # Intentar todos los posibles 2-opt swaps (saltando segmentos adyacentes)
+        for i in range(1, n - 2):
+            a, b = tour[i - 1], tour[i]
+            row_a, row_b = dist[a], dist[b]
+            base = row_a[b] + backward[i] - forward[i]
+            for j in range(i + 2, n):
+                c, d = tour[j - 1], tour[j]
+                
+                # Revertir tour[i:j] reemplaza (a, b) y (c, d) por (a, c) y (b, d)
+                delta = (row_a[c] + row_b[d] - dist[c][d]
+                         + backward[j - 1] - forward[j - 1] - base)
+                
+                # Si es mejor, actualizar
+                if delta < -1e-9:
+                    tour[i:j] = tour[i:j][::-1]
+                    improved = True
+                    break  # Reintentar desde el inicio
+            
+            if improved:
+                break
+    
+    return iteration
+
+
+def two_opt_tour_neighbors(tour: List[int], dist: List[List[float]],
+                           neighbors: List[List[int]], max_iterations: int) -> int:
+    """
+    Variante de `two_opt_tour` restringida a listas de candidatos
+    
+    Revertir tour[i:j] reemplaza (a, b) y (c, d) por (a, c) y (b, d), y con
+    distancias simétricas toda mejora cumple d(a, c) < d(a, b) o
+    d(b, d) < d(c, d). Por eso cada nodo t1 prueba sus dos aristas de la
+    ruta como arista eliminada (t1, t2): la siguiente, como a, y la anterior,
+    como d. Para cada una recorre los vecinos cercanos t3 de t1 mientras
+    d(t1, t3) < d(t1, t2). El costo por pasada baja de O(n²) a O(n·k).
+    
+    Args:
+        tour: Ruta como lista de índices (el primero es fijo); se modifica
+        dist: Matriz de distancias indexada por índice
+        neighbors: Para cada índice, candidatos ordenados por distancia
+        max_iterations: Máximo de pasadas de mejora
+    
+    Returns:
+        Número de iteraciones realizadas
+    """
+    n = len(tour)
+    position = [0] * n
+    forward = [0.0] * n
+    backward = [0.0] * n
+    improved = True
+    iteration = 0
+    
+    while improved and iteration < max_iterations:
+        improved = False
+        iteration += 1
+        
+        for k, node in enumerate(tour):
+            position[node] = k
+        for k in range(1, n):
+            prev, curr = tour[k - 1], tour[k]
+            forward[k] = forward[k - 1] + dist[prev][curr]
+            backward[k] = backward[k - 1] + dist[curr][prev]
+        
+        for p in range(n):
+            t1 = tour[p]
+            row_1 = dist[t1]
+            move = None
+            
+            # t1 = a, t2 = b (siguiente): la nueva arista (a, c) debe acortar (a, b)
+            i = p + 1
+            if i <= n - 3:
+                b = tour[i]
+                removed = row_1[b]
+                for c in neighbors[t1]:
+                    if row_1[c] >= removed:
+                        break  # Candidatos ordenados: ninguno posterior acorta (a, ·)
+                    j = position[c] + 1  # c ocupa la posición j - 1
+                    if i + 2 <= j < n and _reversal_delta(dist, tour, forward, backward, i, j) < -1e-9:
+                        move = (i, j)
+                        break
+            
+            # t1 = d, t2 = c (anterior): la nueva arista (b, d) debe acortar (c, d)
+            j = p
+            if move is None and j >= 3:
+                removed = row_1[tour[j - 1]]
+                for b in neighbors[t1]:
+                    if row_1[b] >= removed:
+                        break
+                    i = position[b]  # b ocupa la posición i
+                    if 1 <= i <= j - 2 and _reversal_delta(dist, tour, forward, backward, i, j) < -1e-9:
+                        move = (i, j)
+                        break
+            
+            if move is not None:
+                i, j = move
+                tour[i:j] = tour[i:j][::-1]
+                improved = True
+                break  # Reintentar desde el inicio
+    
+    return iteration
+
+
+def _reversal_delta(dist: List[List[float]], tour: List[int], forward: List[float],
+                    backward: List[float], i: int, j: int) -> float:
+    """Cambio de costo al revertir tour[i:j], con las sumas prefijas de la ruta"""
+    a, b, c, d = tour[i - 1], tour[i], tour[j - 1], tour[j]
+    return (dist[a][c] + dist[b][d] - dist[a][b] - dist[c][d]
+            + backward[j - 1] - forward[j - 1] - backward[i] + forward[i])
+
+
+def nearest_candidates(dist: List[List[float]], k: int) -> List[List[int]]:
+    """Para cada índice, sus k vecinos más cercanos (sin sí mismo ni el inicio)"""
+    n = len(dist)
+    return [
+        sorted((c for c in range(1, n) if c != a), key=dist[a].__getitem__)[:k]
+        for a in range(n)
+    ]
+
+
+def local_search(tour: List[int], dist: List[List[float]], max_iterations: int,
+                 neighbors: Optional[List[List[int]]] = None) -> int:
+    """
+    Aplica 2-opt sobre `tour`, podado con las listas de candidatos `neighbors`
+    (ver nearest_candidates) si se dan; sin ellas, búsqueda completa
+    """
+    if neighbors is not None:
+        return two_opt_tour_neighbors(tour, dist, neighbors, max_iterations)
+    return two_opt_tour(tour, dist, max_iterations)
+
+
+def tour_distance(tour: List[int], dist: List[List[float]]) -> float:
+    """Calcula la distancia total de una ruta de índices"""
+    return sum(dist[tour[k]][tour[k + 1]] for k in range(len(tour) - 1))
+
+
+def double_bridge(tour: List[int], rng: random.Random) -> List[int]:
+    """
+    Perturbación double-bridge (4-opt) que mantiene fijo el punto de inicio
+    
+    Corta la ruta en cuatro tramos A|B|C|D (A contiene el inicio) y los
+    reconecta como A|D|C|B, un movimiento que 2-opt no puede deshacer.
+    """
+    p1, p2, p3 = sorted(rng.sample(range(1, len(tour)), 3))
+    return tour[:p1] + tour[p3:] + tour[p2:p3] + tour[p1:p2]
+
+
+def held_karp_path(dist: List[List[float]]) -> List[int]:
+    """
+    Ruta abierta óptima desde el índice 0 por programación dinámica (Held-Karp)
+    
+    `cost[mask][j]` es el costo mínimo de salir del inicio, visitar el
+    conjunto de destinos `mask` (bit k = índice k + 1) y terminar en j. Cada
+    máscara se resuelve a partir de sus subconjuntos con un elemento menos,
+    que son menores, así que basta recorrerlas en orden creciente.
+    O(n²·2ⁿ) en tiempo y O(n·2ⁿ) en memoria: solo para pocos destinos.
+    
+    Returns:
+        Ruta de índices que empieza en 0 y visita todos una vez
+    """
+    m = len(dist) - 1
+    if m <= 1:
+        return list(range(m + 1))
+    
+    inf = float('inf')
+    size = 1 << m
+    cost = [[inf] * m for _ in range(size)]
+    parent = [[-1] * m for _ in range(size)]
+    # Distancias entre destinos con índices desplazados a 0..m-1
+    rows = [row[1:] for row in dist[1:]]
+    for j in range(m):
+        cost[1 << j][j] = dist[0][j + 1]
+    
+    for mask in range(3, size):
+        members = [j for j in range(m) if mask >> j & 1]
+        if len(members) < 2:
+            continue
+        mask_cost, mask_parent = cost[mask], parent[mask]
+        for j in members:
+            prev_cost = cost[mask ^ (1 << j)]
+            best, best_i = inf, -1
+            for i in members:
+                if i != j:
+                    candidate = prev_cost[i] + rows[i][j]
+                    if candidate < best or best_i == -1:
+                        best, best_i = candidate, i
+            mask_cost[j] = best
+            mask_parent[j] = best_i
+    
+    # Reconstruir desde el mejor final hacia atrás
+    mask = size - 1
+    last = min(range(m), key=cost[mask].__getitem__)
+    reversed_path = []
+    while last != -1:
+        reversed_path.append(last + 1)
+        mask, last = mask ^ (1 << last), parent[mask][last]
+    return [0] + reversed_path[::-1]
+
+
+def _run_two_opt(job: Tuple[List[int], List[List[float]], int, Optional[List[List[int]]]]) -> Tuple[List[int], int]:
+    """Ejecuta `local_search` sobre una ruta inicial (picklable para multiprocessing)"""
+    tour, dist, max_iterations, neighbors = job
+    iterations = local_search(tour, dist, max_iterations, neighbors)
+    return tour, iterations
 
 
 class OptimizationStrategy(ABC):
@@ -28,138 +291,299 @@ class OptimizationStrategy(ABC):
     
     def __init__(self, road_grid):
         self.road_grid = road_grid
+        # Índice de intersección origen -> (distancias, predecesores, radio)
+        self._shortest_paths: Dict[int, SweepResult] = {}
+        # RoadGrid.version para el que es válida `_shortest_paths`
+        self._shortest_paths_version = road_grid.version
+        # Buffers de las consultas punto a punto, creados en la primera
+        self._search_buffers: Optional[SearchBuffers] = None
     
     @abstractmethod
     def optimize(self, start_poi: str, destination_pois: List[str]) -> OptimizedRoute:
         """Implementa la estrategia de optimización"""
         pass
     
+    @staticmethod
+    def _tour_pois(start_poi: str, destination_pois: List[str]) -> List[str]:
+        """POIs de la ruta: el inicio en la posición 0 y los destinos sin duplicados"""
+        return [start_poi] + list(dict.fromkeys(destination_pois))
+    
     def _solve_tsp_nearest_neighbor(self, start_poi: str, destination_pois: List[str],
-                                    distance_matrix: Dict) -> List[str]:
-        """TSP usando heurística de vecino más cercano"""
-        unvisited = set(destination_pois)
-        path = [start_poi]
-        current = start_poi
+                                    distance_matrix: Dict[Tuple[str, str], float]) -> List[str]:
+        """
+        TSP usando heurística de vecino más cercano sobre una matriz por IDs de POI
+        
+        Contrato para estrategias propias que usan `_calculate_poi_distance_matrix`;
+        los pares ausentes cuentan como infinito. Ver `_solve_tsp_nearest_neighbor_indices`.
+        
+        Returns:
+            Ruta como lista de POI IDs, empezando por `start_poi`
+        """
+        pois = self._tour_pois(start_poi, destination_pois)
+        inf = float('inf')
+        dist = [[distance_matrix.get((from_poi, to_poi), inf) for to_poi in pois] for from_poi in pois]
+        return [pois[k] for k in self._solve_tsp_nearest_neighbor_indices(dist)]
+    
+    def _solve_tsp_nearest_neighbor_indices(self, dist: List[List[float]]) -> List[int]:
+        """
+        TSP usando heurística de vecino más cercano
+        
+        Trabaja sobre filas de la matriz indexadas por posición: cada paso es
+        un `min` con `row.__getitem__` como clave, sin lambdas ni hashing de
+        tuplas de strings. Los empates se resuelven por orden de destino.
+        
+        Returns:
+            Ruta como lista de índices de POI, empezando por el inicio (0)
+        """
+        unvisited = list(range(1, len(dist)))
+        tour = [0]
+        current = 0
         
         while unvisited:
-            nearest = min(
-                unvisited,
-                key=lambda dest: distance_matrix.get((current, dest), float('inf'))
-            )
-            path.append(nearest)
+            nearest = min(unvisited, key=dist[current].__getitem__)
+            tour.append(nearest)
             unvisited.remove(nearest)
             current = nearest
         
-        return path
+        return tour
     
-    def _dijkstra_distance(self, start_intersection: str, end_intersection: str) -> float:
-        """Calcula la distancia mínima entre dos intersecciones"""
-        distances = {inter_id: float('inf') for inter_id in self.road_grid.intersections}
-        distances[start_intersection] = 0
-        visited = set()
-        pq = [(0, start_intersection)]
+    def set_shortest_path_cache(self, cache: Dict[int, SweepResult]) -> None:
+        """
+        Comparte una caché de caminos mínimos entre ejecuciones
         
-        while pq:
-            current_distance, current_intersection = heapq.heappop(pq)
-            
-            if current_intersection in visited:
-                continue
-            
-            if current_intersection == end_intersection:
-                return current_distance
-            
-            visited.add(current_intersection)
-            
-            for neighbor_id, edge_distance in self.road_grid.get_neighbors(current_intersection):
-                if neighbor_id not in visited:
-                    new_distance = current_distance + edge_distance
-                    if new_distance < distances[neighbor_id]:
-                        distances[neighbor_id] = new_distance
-                        heapq.heappush(pq, (new_distance, neighbor_id))
+        Args:
+            cache: Diccionario índice de intersección origen -> (distancias,
+                predecesores, radio) por índice denso, válido solo para el
+                estado actual de bloqueos del grid
+        """
+        self._shortest_paths = cache
+        self._shortest_paths_version = self.road_grid.version
+    
+    def _shortest_path_cache(self) -> Dict[int, SweepResult]:
+        """
+        Caché de caminos mínimos válida para el estado actual de bloqueos
         
-        return distances[end_intersection]
+        Si el grid cambió (`version`) desde que se llenó, se sustituye por una
+        vacía. No se vacía en el sitio: una caché compartida con
+        set_shortest_path_cache sigue siendo válida para su estado.
+        """
+        version = self.road_grid.version
+        if self._shortest_paths_version != version:
+            self._shortest_paths = {}
+            self._shortest_paths_version = version
+        return self._shortest_paths
+    
+    def _has_sweep(self, start: int, targets: Optional[List[int]] = None) -> bool:
+        """Indica si la caché ya tiene distancias definitivas desde `start` hacia `targets` (o todas)"""
+        entry = self._shortest_path_cache().get(start)
+        if entry is None:
+            return False
+        distances, _, radius = entry
+        if targets is None:
+            return radius == float('inf')
+        return all(distances[target] <= radius for target in targets)
+    
+    def _shortest_paths_from(self, start: int,
+                             targets: Optional[List[int]] = None) -> Tuple[List[float], List[int]]:
+        """
+        Obtiene (distancias, predecesores) desde una intersección (índice denso), memoizado
+        
+        Con `targets` basta un barrido que los haya asentado, aunque se haya
+        detenido antes de recorrer todo el grid; sin ellos se exige uno
+        completo. Si ya hay un barrido parcial que no alcanza, se rehace
+        completo para no alternar entre barridos parciales.
+        """
+        cache = self._shortest_path_cache()
+        if not self._has_sweep(start, targets):
+            cache[start] = self._dijkstra_all(start, None if start in cache else targets)
+        distances, previous, _ = cache[start]
+        return distances, previous
+    
+    def _prefetch_shortest_paths(self, sources: List[int]) -> None:
+        """
+        Calcula en paralelo los barridos que faltan en caché para `sources`
+        
+        Cada barrido se detiene al alcanzar todos los `sources` (los destinos
+        de la matriz). Los barridos desde distintos orígenes son independientes. Si hay
+        varios núcleos y el trabajo pendiente (orígenes × intersecciones)
+        supera _PARALLEL_SWEEP_MIN_WORK, se reparten en un pool de procesos;
+        si no, se dejan para el cálculo perezoso de `_shortest_paths_from`.
+        """
+        cache = self._shortest_path_cache()
+        missing = [idx for idx in dict.fromkeys(sources) if not self._has_sweep(idx, sources)]
+        processes = min(len(missing), os.cpu_count() or 1)
+        if processes < 2 or len(missing) * len(self.road_grid.idx_to_id) < _PARALLEL_SWEEP_MIN_WORK:
+            return
+        
+        neighbors, weights = self.road_grid.get_passable_neighbors()
+        graph = (neighbors, weights, self.road_grid.uniform_road_length)
+        with multiprocessing.Pool(processes=processes, initializer=init_sweep_worker,
+                                  initargs=graph) as pool:
+            jobs = [(idx, None if idx in cache else sources) for idx in missing]
+            for idx, result in zip(missing, pool.map(run_sweep, jobs)):
+                cache[idx] = result
+    
+    def _dijkstra_all(self, start: int, targets: Optional[List[int]] = None) -> SweepResult:
+        """
+        Ejecuta Dijkstra desde una intersección, completo o hasta asentar `targets`
+        
+        Trabaja sobre índices densos del grid: distancias y predecesores son
+        listas indexadas por intersección (-1 = sin predecesor). Si todas las
+        carreteras tienen la misma longitud, usa BFS (O(V+E), sin cola de
+        prioridad), que produce las mismas distancias.
+        
+        Returns:
+            Tupla (distancias, predecesores, radio); ver SweepResult
+        """
+        neighbors, weights = self.road_grid.get_passable_neighbors()
+        return shortest_path_sweep(neighbors, weights, start, self.road_grid.uniform_road_length,
+                                   targets)
+    
+    def _dijkstra_distance(self, start_intersection: str, end_intersection: str) -> float:
+        """Calcula la distancia mínima entre dos intersecciones"""
+        id_to_idx = self.road_grid.id_to_idx
+        start, end = id_to_idx[start_intersection], id_to_idx[end_intersection]
+        if self._prefers_point_to_point(start, end):
+            return self._point_to_point(start, end)[0]
+        distances, _ = self._shortest_paths_from(start, [end])
+        return distances[end]
     
     def _dijkstra_path(self, start_intersection: str, end_intersection: str) -> List[str]:
         """Retorna la secuencia de intersecciones del camino más corto"""
-        distances = {inter_id: float('inf') for inter_id in self.road_grid.intersections}
-        previous = {inter_id: None for inter_id in self.road_grid.intersections}
-        distances[start_intersection] = 0
-        visited = set()
-        pq = [(0, start_intersection)]
-        
-        while pq:
-            current_distance, current_intersection = heapq.heappop(pq)
-            
-            if current_intersection in visited:
-                continue
-            visited.add(current_intersection)
-            
-            for neighbor_id, edge_distance in self.road_grid.get_neighbors(current_intersection):
-                if neighbor_id not in visited:
-                    new_distance = current_distance + edge_distance
-                    if new_distance < distances[neighbor_id]:
-                        distances[neighbor_id] = new_distance
-                        previous[neighbor_id] = current_intersection
-                        heapq.heappush(pq, (new_distance, neighbor_id))
+        id_to_idx = self.road_grid.id_to_idx
+        return self._path_ids(self._segment_indices(id_to_idx[start_intersection],
+                                                    id_to_idx[end_intersection]))
+    
+    def _segment_indices(self, start: int, end: int) -> List[int]:
+        """
+        Camino más corto entre dos intersecciones como índices densos
+        
+        Si no hay camino retorna solo `end`, como la reconstrucción por predecesores.
+        """
+        if self._prefers_point_to_point(start, end):
+            return self._point_to_point(start, end)[1] or [end]
+        _, previous = self._shortest_paths_from(start, [end])
         
         # Reconstruir camino
         path = []
-        current = end_intersection
-        while current is not None:
+        current = end
+        while current != -1:
             path.append(current)
             current = previous[current]
-        return path[::-1]
+        path.reverse()
+        return path
+    
+    def _prefers_point_to_point(self, start: int, end: int) -> bool:
+        """
+        Indica si una consulta de `start` a `end` conviene resolverla de forma aislada
+        
+        Sin barrido en caché que la cubra, A* recorre una fracción del grid y
+        no se guarda. Si la heurística Manhattan no es admisible se calcula el
+        barrido y queda en caché.
+        """
+        # La caché primero: manhattan_admissible recorre todas las aristas la primera vez
+        return not self._has_sweep(start, [end]) and self.road_grid.manhattan_admissible
+    
+    def _point_to_point(self, start: int, end: int) -> Tuple[float, List[int]]:
+        """Camino mínimo entre dos intersecciones con A*"""
+        grid = self.road_grid
+        if start != end and not grid.intersection_passable[end]:
+            return float('inf'), []
+        neighbors, weights = grid.get_passable_neighbors()
+        if self._search_buffers is None:
+            self._search_buffers = SearchBuffers.for_size(len(neighbors))
+        return astar_search(neighbors, weights, grid.pixel_x, grid.pixel_y,
+                            start, end, self._search_buffers)
     
     def _calculate_poi_distance_matrix(self, pois: List[str]) -> Dict[Tuple[str, str], float]:
-        """Calcula matriz de distancias mínimas entre POIs"""
-        matrix = {}
-        for from_poi in pois:
-            for to_poi in pois:
-                if from_poi != to_poi:
-                    from_intersection = self.road_grid.get_poi_intersection(from_poi)
-                    to_intersection = self.road_grid.get_poi_intersection(to_poi)
-                    if from_intersection and to_intersection:
-                        distance = self._dijkstra_distance(
-                            from_intersection.intersection_id,
-                            to_intersection.intersection_id
-                        )
-                        matrix[(from_poi, to_poi)] = distance
+        """
+        Calcula matriz de distancias mínimas entre POIs
+        
+        Contrato para estrategias propias: {(poi origen, poi destino): distancia}
+        para cada par de POIs distintos ubicados en el grid. Las estrategias
+        del módulo usan las filas por índice de `_calculate_poi_distance_rows`.
+        """
+        rows = self._calculate_poi_distance_rows(pois)
+        poi_map = self.road_grid.poi_map
+        located = [i for i, poi in enumerate(pois) if poi in poi_map]
+        return {
+            (pois[i], pois[j]): rows[i][j]
+            for i in located for j in located if pois[i] != pois[j]
+        }
+    
+    def _calculate_poi_distance_rows(self, pois: List[str]) -> List[List[float]]:
+        """
+        Calcula matriz de distancias mínimas entre POIs, por posición
+        
+        Ejecuta un único Dijkstra por POI de origen, que se detiene al asentar
+        todos los POIs; los predecesores quedan en caché para reconstruir los
+        segmentos de la ruta sin recalcular.
+        
+        Returns:
+            Filas indexadas por la posición del POI en `pois`: `dist[i][j]` es
+            la distancia de `pois[i]` a `pois[j]` (0 en la diagonal, infinito
+            si alguno de los dos no está ubicado en el grid)
+        """
+        # Posición del POI -> índice denso de su intersección (None si no está en el grid)
+        id_to_idx = self.road_grid.id_to_idx
+        poi_map = self.road_grid.poi_map
+        targets = [id_to_idx[poi_map[poi]] if poi in poi_map else None for poi in pois]
+        
+        located = [idx for idx in targets if idx is not None]
+        self._prefetch_shortest_paths(located)
+        
+        inf = float('inf')
+        unreachable = [inf] * len(pois)
+        matrix = []
+        for i, from_idx in enumerate(targets):
+            if from_idx is None:
+                row = unreachable[:]
+            else:
+                distances, _ = self._shortest_paths_from(from_idx, located)
+                row = [inf if to_idx is None else distances[to_idx] for to_idx in targets]
+            row[i] = 0.0
+            matrix.append(row)
         return matrix
     
     def _build_full_path(self, poi_path: List[str]) -> List[str]:
         """Construye la ruta completa a través del grid"""
-        full_path = []
+        return self._path_ids(self._build_full_path_indices(poi_path))
+    
+    def _build_full_path_indices(self, poi_path: List[str]) -> array:
+        """
+        Ruta completa como índices densos del grid (int32)
         
-        for i in range(len(poi_path) - 1):
-            from_poi = poi_path[i]
-            to_poi = poi_path[i + 1]
-            
-            from_intersection = self.road_grid.get_poi_intersection(from_poi)
-            to_intersection = self.road_grid.get_poi_intersection(to_poi)
-            
-            segment = self._dijkstra_path(
-                from_intersection.intersection_id,
-                to_intersection.intersection_id
-            )
-            
-            if i == 0:
-                full_path.extend(segment)
-            else:
-                full_path.extend(segment[1:])
+        Empalma los caminos de cada tramo entre POIs, reconstruidos con los
+        predecesores que dejó en caché la matriz de distancias, sin pasar por
+        IDs de intersección hasta el final.
+        """
+        id_to_idx = self.road_grid.id_to_idx
+        poi_map = self.road_grid.poi_map
+        stops = [id_to_idx[poi_map[poi]] for poi in poi_path]
         
+        full_path = array('i')
+        for i in range(len(stops) - 1):
+            segment = self._segment_indices(stops[i], stops[i + 1])
+            full_path.extend(segment if i == 0 else segment[1:])
         return full_path
     
+    def _path_ids(self, path: Iterable[int]) -> List[str]:
+        """Convierte una secuencia de índices densos a IDs de intersección"""
+        return list(map(self.road_grid.idx_to_id.__getitem__, path))
+    
     def _calculate_path_distance(self, poi_path: List[str]) -> float:
-        """Calcula la distancia total de una ruta de POIs"""
-        total = 0
-        for i in range(len(poi_path) - 1):
-            from_poi = poi_path[i]
-            to_poi = poi_path[i + 1]
-            total += self._dijkstra_distance(
-                self.road_grid.get_poi_intersection(from_poi).intersection_id,
-                self.road_grid.get_poi_intersection(to_poi).intersection_id
-            )
-        return total
+        """
+        Calcula la distancia total de una ruta de POIs
+        
+        Las estrategias que ya tienen la matriz de distancias suman sus tramos
+        con `tour_distance`; esto es para rutas de POIs sin matriz.
+        """
+        poi_map = self.road_grid.poi_map
+        intersections = [poi_map[poi] for poi in poi_path]
+        return sum(
+            self._dijkstra_distance(from_id, to_id)
+            for from_id, to_id in zip(intersections, intersections[1:])
+        )
 
 
 class NearestNeighborStrategy(OptimizationStrategy):
@@ -167,99 +591,168 @@ class NearestNeighborStrategy(OptimizationStrategy):
     
     def optimize(self, start_poi: str, destination_pois: List[str]) -> OptimizedRoute:
         """TSP usando vecino más cercano"""
-        all_pois = [start_poi] + destination_pois
-        distance_matrix = self._calculate_poi_distance_matrix(all_pois)
+        pois = self._tour_pois(start_poi, destination_pois)
+        dist = self._calculate_poi_distance_rows(pois)
         
         # Resolver TSP
-        poi_path = self._solve_tsp_nearest_neighbor(start_poi, destination_pois, distance_matrix)
+        tour = self._solve_tsp_nearest_neighbor_indices(dist)
+        poi_path = [pois[k] for k in tour]
         
-        # Construir ruta completa
-        full_path = self._build_full_path(poi_path)
-        total_distance = self._calculate_path_distance(poi_path)
+        # Construir ruta completa (la distancia sale de la matriz, sin nuevas consultas)
+        full_path_indices = self._build_full_path_indices(poi_path)
+        total_distance = tour_distance(tour, dist)
         
         return OptimizedRoute(
             path=poi_path,
-            full_path=full_path,
+            full_path=self._path_ids(full_path_indices),
             total_distance=total_distance,
-            algorithm_name="TSP Nearest Neighbor"
+            algorithm_name="TSP Nearest Neighbor",
+            full_path_indices=full_path_indices
         )
 
 
 class TwoOptStrategy(OptimizationStrategy):
     """Nearest Neighbor + 2-Opt - Optimización local"""
     
-    def __init__(self, road_grid, max_iterations: int = 1000):
+    algorithm_name = "TSP + 2-Opt Local Search"
+    
+    def __init__(self, road_grid, max_iterations: int = 1000, n_restarts: int = 1,
+                 seed: int = 0, neighbor_k: int = 0):
         super().__init__(road_grid)
         self.max_iterations = max_iterations
+        self.n_restarts = max(1, n_restarts)
+        self.seed = seed
+        self.neighbor_k = neighbor_k  # 0 desactiva las listas de candidatos
     
     def optimize(self, start_poi: str, destination_pois: List[str]) -> OptimizedRoute:
         """TSP usando vecino más cercano + 2-opt"""
-        all_pois = [start_poi] + destination_pois
-        distance_matrix = self._calculate_poi_distance_matrix(all_pois)
+        pois = self._tour_pois(start_poi, destination_pois)
+        dist = self._calculate_poi_distance_rows(pois)
         
         # Paso 1: Obtener ruta inicial con nearest neighbor
-        poi_path = self._solve_tsp_nearest_neighbor(start_poi, destination_pois, distance_matrix)
+        tour = self._solve_tsp_nearest_neighbor_indices(dist)
         
         # Paso 2: Mejorar con 2-opt
-        poi_path, iterations = self._two_opt(poi_path, distance_matrix)
+        tour, iterations = self._two_opt(tour, dist)
+        poi_path = [pois[k] for k in tour]
         
         # Paso 3: Construir ruta completa
-        full_path = self._build_full_path(poi_path)
-        total_distance = self._calculate_path_distance(poi_path)
+        full_path_indices = self._build_full_path_indices(poi_path)
+        total_distance = tour_distance(tour, dist)
         
         return OptimizedRoute(
             path=poi_path,
-            full_path=full_path,
+            full_path=self._path_ids(full_path_indices),
             total_distance=total_distance,
-            algorithm_name="TSP + 2-Opt Local Search",
-            iterations=iterations
+            algorithm_name=self.algorithm_name,
+            iterations=iterations,
+            full_path_indices=full_path_indices
         )
     
-    def _two_opt(self, route: List[str], distance_matrix: Dict) -> Tuple[List[str], int]:
+    def _two_opt(self, route: List[int], dist: List[List[float]]) -> Tuple[List[int], int]:
         """
         Algoritmo 2-Opt: intercambia pares de aristas para reducir cruces
         
-        Intenta revertir segmentos de la ruta para encontrar mejoras.
-        Para cada par de posiciones (i, j), intenta revertir el segmento
-        entre ellas y mantiene el cambio si mejora la distancia.
+        Opera sobre índices de POI y la matriz de distancias por índice, y
+        delega la búsqueda local en `local_search`. Con `n_restarts > 1` lanza
+        además búsquedas desde permutaciones aleatorias y conserva la mejor
+        ruta encontrada; se reparten en procesos solo si el trabajo supera
+        _PARALLEL_TWO_OPT_MIN_WORK (el resultado es el mismo en ambos casos).
         """
-        best_route = route[:]
-        improved = True
-        iteration = 0
+        n = len(route)
         
-        while improved and iteration < self.max_iterations:
-            improved = False
-            iteration += 1
-            best_distance = self._calculate_route_distance(best_route, distance_matrix)
-            
-            # Intentar todos los posibles 2-opt swaps
-            for i in range(1, len(best_route) - 2):
-                for j in range(i + 1, len(best_route)):
-                    if j - i == 1:
-                        continue  # Saltar si son adyacentes
-                    
-                    # Crear nueva ruta invirtiendo segmento entre i y j
-                    new_route = best_route[:i] + best_route[i:j][::-1] + best_route[j:]
-                    new_distance = self._calculate_route_distance(new_route, distance_matrix)
-                    
-                    # Si es mejor, actualizar
-                    if new_distance < best_distance:
-                        best_route = new_route
-                        best_distance = new_distance
-                        improved = True
-                        break  # Reintentar desde el inicio
-                
-                if improved:
+        # La primera ruta es la recibida; el resto son permutaciones con el inicio fijo
+        rng = random.Random(self.seed)
+        tours = [route[:]]
+        for _ in range(self.n_restarts - 1):
+            rest = list(range(1, n))
+            rng.shuffle(rest)
+            tours.append([route[0]] + [route[k] for k in rest])
+        
+        neighbors = self._candidate_lists(dist)
+        jobs = [(tour, dist, self.max_iterations, neighbors) for tour in tours]
+        processes = min(len(jobs), os.cpu_count() or 1)
+        if processes > 1 and len(jobs) * n * n >= _PARALLEL_TWO_OPT_MIN_WORK:
+            with multiprocessing.Pool(processes=processes) as pool:
+                results = pool.map(_run_two_opt, jobs)
+        else:
+            results = [_run_two_opt(job) for job in jobs]
+        
+        return min(results, key=lambda result: tour_distance(result[0], dist))
+    
+    def _candidate_lists(self, dist: List[List[float]]) -> Optional[List[List[int]]]:
+        """
+        Listas de `neighbor_k` candidatos por POI para podar 2-opt, o None
+        
+        Se calculan una vez por optimización y las comparten todas las
+        búsquedas locales. Solo se usan cuando k < n - 2: en instancias
+        pequeñas la búsqueda completa es exacta y igual de barata.
+        """
+        if self.neighbor_k and self.neighbor_k < len(dist) - 2:
+            return nearest_candidates(dist, self.neighbor_k)
+        return None
+
+
+class IteratedLocalSearchStrategy(TwoOptStrategy):
+    """Nearest Neighbor + 2-Opt + Búsqueda Local Iterada (double-bridge)"""
+    
+    algorithm_name = "TSP + 2-Opt + Iterated Local Search"
+    
+    def __init__(self, road_grid, max_iterations: int = 1000, time_budget: float = 0.5,
+                 max_rounds: int = 200, seed: int = 0, neighbor_k: int = 0):
+        super().__init__(road_grid, max_iterations=max_iterations, seed=seed,
+                         neighbor_k=neighbor_k)
+        self.time_budget = time_budget
+        self.max_rounds = max_rounds
+    
+    def _two_opt(self, route: List[int], dist: List[List[float]]) -> Tuple[List[int], int]:
+        """
+        Búsqueda local iterada sobre 2-opt
+        
+        Lleva la ruta a un mínimo local con 2-opt, la perturba con un
+        double-bridge, vuelve a aplicar 2-opt y acepta el resultado si mejora.
+        Repite hasta agotar `time_budget` segundos o `max_rounds` rondas.
+        """
+        n = len(route)
+        
+        neighbors = self._candidate_lists(dist)
+        best_tour = route[:]
+        iterations = local_search(best_tour, dist, self.max_iterations, neighbors)
+        best_cost = tour_distance(best_tour, dist)
+        
+        # double-bridge necesita al menos tres destinos además del inicio
+        if n >= 4:
+            rng = random.Random(self.seed)
+            deadline = time.monotonic() + self.time_budget
+            for _ in range(self.max_rounds):
+                if time.monotonic() > deadline:
                     break
+                candidate = double_bridge(best_tour, rng)
+                iterations += local_search(candidate, dist, self.max_iterations, neighbors)
+                cost = tour_distance(candidate, dist)
+                if cost < best_cost - 1e-9:
+                    best_tour, best_cost = candidate, cost
         
-        return best_route, iteration
+        return best_tour, iterations
+
+
+class HeldKarpStrategy(TwoOptStrategy):
+    """Held-Karp (programación dinámica exacta) para pocos destinos, 2-Opt si no"""
     
-    def _calculate_route_distance(self, route: List[str], distance_matrix: Dict) -> float:
-        """Calcula la distancia total de una ruta"""
-        total = 0
-        for i in range(len(route) - 1):
-            total += distance_matrix.get((route[i], route[i + 1]), float('inf'))
-        return total
+    algorithm_name = "TSP Held-Karp (exacto)"
+    
+    def __init__(self, road_grid, max_exact_destinations: int = 14, **kwargs):
+        super().__init__(road_grid, **kwargs)
+        self.max_exact_destinations = max_exact_destinations
+    
+    def _two_opt(self, route: List[int], dist: List[List[float]]) -> Tuple[List[int], int]:
+        """
+        Ruta óptima con Held-Karp si hay a lo sumo `max_exact_destinations`
+        destinos; por encima el costo exponencial no compensa y se aplica 2-Opt
+        """
+        if len(route) - 1 > self.max_exact_destinations:
+            return super()._two_opt(route, dist)
+        return held_karp_path(dist), 0
 
 
 class OptimizationStrategyFactory:
@@ -268,6 +761,8 @@ class OptimizationStrategyFactory:
     _strategies = {
         "nearest_neighbor": NearestNeighborStrategy,
         "2opt": TwoOptStrategy,
+        "ils": IteratedLocalSearchStrategy,
+        "held_karp": HeldKarpStrategy,
     }
     
     @classmethod
@@ -276,7 +771,7 @@ class OptimizationStrategyFactory:
         Crea una estrategia de optimización
         
         Args:
-            strategy_name: Nombre de la estrategia ("nearest_neighbor", "2opt", etc.)
+            strategy_name: Nombre de la estrategia ("nearest_neighbor", "2opt", "ils", "held_karp", etc.)
             road_grid: Instancia de RoadGrid
             **kwargs: Parámetros adicionales para la estrategia
         
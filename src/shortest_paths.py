@@ -0,0 +1,219 @@
+"""
+Módulo de núcleos de caminos mínimos sobre el grid.
+
+Todos trabajan sobre índices densos de intersección y la vecindad
+transitable de RoadGrid.get_passable_neighbors():
+- Barridos desde un origen: BFS (longitud uniforme) y Dijkstra con heapq,
+  opcionalmente detenidos al asentar un conjunto de destinos
+- Consultas punto a punto: A* (heurística Manhattan)
+- Funciones para repartir barridos en un pool de procesos
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Resultado de un barrido de caminos mínimos: (distancias, predecesores, radio).
+# Las distancias <= radio son definitivas (y también su cadena de predecesores);
+# un barrido completo tiene radio infinito
+SweepResult = Tuple[List[float], List[int], float]
+
+
+def _target_flags(n: int, targets: Optional[Iterable[int]]) -> Tuple[bytearray, int]:
+    """Marca los destinos de un barrido por índice denso y cuenta los distintos"""
+    flags = bytearray(n)
+    for target in targets or ():
+        flags[target] = 1
+    return flags, flags.count(1)
+
+
+def dijkstra_sweep(neighbors: List[List[int]], weights: List[List[float]], start: int,
+                   targets: Optional[Iterable[int]] = None) -> SweepResult:
+    """
+    Dijkstra desde `start` sobre listas de vecinos ya transitables
+    
+    Con `targets` se detiene en cuanto todos quedan asentados: el trabajo lo
+    acota el destino más lejano y no el tamaño del grid.
+    
+    Returns:
+        Tupla (distancias, predecesores, radio) por índice denso
+        (-1 = sin predecesor); ver SweepResult
+    """
+    n = len(neighbors)
+    distances = [float('inf')] * n
+    previous = [-1] * n
+    distances[start] = 0
+    visited = bytearray(n)
+    is_target, remaining = _target_flags(n, targets)
+    pq = [(0, start)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    
+    while pq:
+        current_distance, current = heappop(pq)
+        
+        if visited[current]:
+            continue
+        visited[current] = 1
+        if is_target[current]:
+            remaining -= 1
+            if not remaining:
+                return distances, previous, current_distance
+        
+        # Solo vecinos transitables: el grid ya filtró los bloqueos
+        for neighbor, weight in zip(neighbors[current], weights[current]):
+            new_distance = current_distance + weight
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                previous[neighbor] = current
+                heappush(pq, (new_distance, neighbor))
+    
+    return distances, previous, float('inf')
+
+
+def bfs_sweep(neighbors: List[List[int]], start: int, road_length: float,
+              targets: Optional[Iterable[int]] = None) -> SweepResult:
+    """
+    BFS desde `start` para grids con carreteras de longitud uniforme
+    
+    Con `targets` se detiene al sacar de la cola el último de ellos: los
+    niveles anteriores ya están completos, así que el radio es su distancia.
+    """
+    n = len(neighbors)
+    distances = [float('inf')] * n
+    previous = [-1] * n
+    distances[start] = 0
+    is_target, remaining = _target_flags(n, targets)
+    # Cola FIFO como lista que se recorre mientras crece (sin popleft)
+    queue = [start]
+    
+    for current in queue:
+        if is_target[current]:
+            remaining -= 1
+            if not remaining:
+                return distances, previous, distances[current]
+        new_distance = distances[current] + road_length
+        
+        for neighbor in neighbors[current]:
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                previous[neighbor] = current
+                queue.append(neighbor)
+    
+    return distances, previous, float('inf')
+
+
+def shortest_path_sweep(neighbors: List[List[int]], weights: List[List[float]], start: int,
+                        road_length: Optional[float] = None,
+                        targets: Optional[Iterable[int]] = None) -> SweepResult:
+    """
+    Caminos mínimos desde `start` hacia todas las intersecciones (o hasta `targets`)
+    
+    Si todas las carreteras miden `road_length` usa BFS (O(V+E), sin cola de
+    prioridad); si no, Dijkstra con heapq. Ambos producen las mismas distancias.
+    """
+    if road_length is not None:
+        return bfs_sweep(neighbors, start, road_length, targets)
+    return dijkstra_sweep(neighbors, weights, start, targets)
+
+
+@dataclass
+class SearchBuffers:
+    """
+    Arrays de trabajo de `astar_search`, reutilizables entre consultas
+    
+    Se entregan limpios (distancias infinitas, sin predecesores, nada
+    asentado) y la búsqueda solo restablece las posiciones que tocó, así una
+    consulta corta no paga O(V) de reserva y relleno en cada llamada.
+    """
+    distances: List[float]
+    previous: List[int]
+    settled: bytearray
+    
+    @classmethod
+    def for_size(cls, n: int) -> "SearchBuffers":
+        """Crea buffers limpios para un grafo de n intersecciones"""
+        return cls([float('inf')] * n, [-1] * n, bytearray(n))
+
+
+def astar_search(neighbors: List[List[int]], weights: List[List[float]],
+                 pixel_x: Sequence[float], pixel_y: Sequence[float], source: int, target: int,
+                 buffers: Optional[SearchBuffers] = None) -> Tuple[float, List[int]]:
+    """
+    A* entre dos intersecciones con la distancia Manhattan en píxeles como heurística
+    
+    Solo es exacto si ninguna carretera es más corta que la distancia
+    Manhattan entre sus extremos (RoadGrid.manhattan_admissible). En un grid
+    de calles ortogonales es la cota en línea recta más ajustada (la
+    euclidiana subestima más). A igual f se expande primero el nodo con
+    mayor g, que avanza hacia `target` en lugar de abrir el rectángulo entero.
+    `target` debe ser transitable (o igual a `source`); con `buffers` (del
+    mismo tamaño que el grafo) no se reservan arrays nuevos.
+    
+    Returns:
+        Tupla (distancia, camino de índices de source a target);
+        (inf, []) si no hay camino
+    """
+    if source == target:
+        return 0.0, [source]
+    
+    if buffers is None:
+        buffers = SearchBuffers.for_size(len(neighbors))
+    distances, previous, settled = buffers.distances, buffers.previous, buffers.settled
+    inf = float('inf')
+    target_x, target_y = pixel_x[target], pixel_y[target]
+    distances[source] = 0
+    touched = [source]
+    # Entradas (f, -g, nodo)
+    pq = [(abs(pixel_x[source] - target_x) + abs(pixel_y[source] - target_y), 0, source)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    
+    try:
+        while pq:
+            _, negative_distance, current = heappop(pq)
+            if settled[current]:
+                continue
+            if current == target:
+                path = []
+                while current != -1:
+                    path.append(current)
+                    current = previous[current]
+                path.reverse()
+                return -negative_distance, path
+            settled[current] = 1
+            
+            current_distance = -negative_distance
+            for neighbor, weight in zip(neighbors[current], weights[current]):
+                new_distance = current_distance + weight
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    touched.append(neighbor)
+                    estimate = abs(pixel_x[neighbor] - target_x) + abs(pixel_y[neighbor] - target_y)
+                    heappush(pq, (new_distance + estimate, -new_distance, neighbor))
+        
+        return inf, []
+    finally:
+        # Dejar los buffers limpios para la siguiente consulta
+        for node in touched:
+            distances[node] = inf
+            previous[node] = -1
+            settled[node] = 0
+
+
+# Vecindad del grid en cada proceso del pool de barridos, fijada una vez por
+# init_sweep_worker para no serializarla en cada tarea
+_sweep_graph: Optional[Tuple[List[List[int]], List[List[float]], Optional[float]]] = None
+
+
+def init_sweep_worker(neighbors: List[List[int]], weights: List[List[float]],
+                      road_length: Optional[float]) -> None:
+    """Inicializador del pool: guarda la vecindad del grid en el proceso"""
+    global _sweep_graph
+    _sweep_graph = (neighbors, weights, road_length)
+
+
+def run_sweep(job: Tuple[int, Optional[List[int]]]) -> SweepResult:
+    """Ejecuta `shortest_path_sweep` en un proceso del pool (picklable para multiprocessing)"""
+    start, targets = job
+    neighbors, weights, road_length = _sweep_graph
+    return shortest_path_sweep(neighbors, weights, start, road_length, targets)